@@ -0,0 +1,237 @@
+"""
+Write-behind analytics store for analyzed messages.
+Request handlers append results to a bounded in-memory buffer; a background task
+flushes them to SQLite in batches and keeps a per-day emotion rollup up to date,
+so reporting queries never scan the raw message rows.
+"""
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    day TEXT NOT NULL,
+    sentiment TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    emotion TEXT NOT NULL,
+    emotion_confidence REAL NOT NULL,
+    emotion_scores TEXT NOT NULL,
+    provider TEXT NOT NULL,
+    latency_ms REAL NOT NULL,
+    provider_latency_ms REAL
+);
+CREATE INDEX IF NOT EXISTS idx_messages_ts ON messages (ts);
+CREATE TABLE IF NOT EXISTS emotion_daily (
+    day TEXT NOT NULL,
+    emotion TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (day, emotion)
+) WITHOUT ROWID;
+"""
+
+_INSERT_MESSAGE = """
+INSERT INTO messages (ts, day, sentiment, score, emotion, emotion_confidence,
+                      emotion_scores, provider, latency_ms, provider_latency_ms)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+_UPSERT_DAILY = """
+INSERT INTO emotion_daily (day, emotion, count) VALUES (?, ?, ?)
+ON CONFLICT (day, emotion) DO UPDATE SET count = count + excluded.count
+"""
+
+Row = Tuple[Any, ...]
+
+
+class AnalyticsStore:
+    """
+    Bounded write-behind buffer in front of a SQLite database.
+
+    record() never touches disk: it appends to the buffer, or counts the record as
+    dropped when the buffer is full. Crossing batch_size wakes the flusher early so
+    bursts drain quickly instead of waiting for the next interval.
+    """
+
+    def __init__(self, path: str, capacity: int = 10000, batch_size: int = 500,
+                 flush_interval: float = 2.0):
+        self.path = path
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.recorded = 0
+        self.dropped = 0
+        self.flushed = 0
+        self.failed = 0
+        self._buffer: Deque[Row] = deque()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def record(self, sentiment_result: Dict[str, Any], provider: str,
+               latency_ms: float, provider_latency_ms: Optional[float] = None) -> bool:
+        """
+        Buffer one analyzed message for the next flush.
+
+        Args:
+            sentiment_result: Output from analyze_sentiment()
+            provider: Provider that produced the reply
+            latency_ms: End-to-end handling time
+            provider_latency_ms: Time spent in the provider, None if no call was made
+
+        Returns:
+            True if buffered, False if dropped because the buffer is full
+        """
+        if len(self._buffer) >= self.capacity:
+            self.dropped += 1
+            return False
+
+        now = time.time()
+        self._buffer.append((
+            now,
+            time.strftime("%Y-%m-%d", time.gmtime(now)),
+            sentiment_result["label"],
+            sentiment_result["score"],
+            sentiment_result["emotion"],
+            sentiment_result["emotion_confidence"],
+            json.dumps(sentiment_result["emotion_scores"]),
+            provider,
+            round(latency_ms, 3),
+            None if provider_latency_ms is None else round(provider_latency_ms, 3)
+        ))
+        self.recorded += 1
+
+        if self._wakeup is not None and len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def _write_batch(self, rows: List[Row]) -> None:
+        daily: Dict[Tuple[str, str], int] = {}
+        for row in rows:
+            key = (row[1], row[4])
+            daily[key] = daily.get(key, 0) + 1
+
+        with self._db_lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany(_INSERT_MESSAGE, rows)
+                conn.executemany(_UPSERT_DAILY, [(day, emotion, count) for (day, emotion), count in daily.items()])
+
+    def _drain(self) -> List[Row]:
+        rows = []
+        while self._buffer and len(rows) < self.batch_size:
+            rows.append(self._buffer.popleft())
+        return rows
+
+    async def flush(self) -> int:
+        """Write everything currently buffered; returns the number of rows written."""
+        written = 0
+        while self._buffer:
+            rows = self._drain()
+            try:
+                await asyncio.to_thread(self._write_batch, rows)
+            except Exception as e:
+                # Any error (e.g. an unwritable database directory) must not end the
+                # flusher task, or every later record would silently be dropped
+                self.failed += len(rows)
+                logger.error("Analytics flush of %d rows failed: %s", len(rows), e)
+                continue
+            self.flushed += len(rows)
+            written += len(rows)
+        return written
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def start(self) -> None:
+        """Start the background flusher on the running event loop."""
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flusher and write out whatever is still buffered."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._wakeup = None
+        await self.flush()
+
+    def _query_emotion_counts(self, days: Optional[int]) -> Dict[str, int]:
+        with self._db_lock:
+            conn = self._connect()
+            if days is None:
+                rows = conn.execute(
+                    "SELECT emotion, SUM(count) FROM emotion_daily GROUP BY emotion"
+                ).fetchall()
+            else:
+                since = time.strftime("%Y-%m-%d", time.gmtime(time.time() - (days - 1) * 86400))
+                rows = conn.execute(
+                    "SELECT emotion, SUM(count) FROM emotion_daily WHERE day >= ? GROUP BY emotion",
+                    (since,)
+                ).fetchall()
+        return {emotion: count for emotion, count in rows}
+
+    async def emotion_counts(self, days: Optional[int] = None) -> Dict[str, int]:
+        """
+        Aggregate emotion counts from the daily rollup table.
+
+        Args:
+            days: Only count the last N days (including today); None for all time
+
+        Returns:
+            Mapping of emotion to number of flushed messages
+        """
+        return await asyncio.to_thread(self._query_emotion_counts, days)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "buffered": len(self._buffer),
+            "capacity": self.capacity,
+            "recorded": self.recorded,
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+            "failed": self.failed
+        }
+
+
+# Global store instance
+analytics_store = AnalyticsStore(
+    settings.analytics_db_path,
+    capacity=settings.analytics_buffer_size,
+    batch_size=settings.analytics_batch_size,
+    flush_interval=settings.analytics_flush_interval_seconds
+)
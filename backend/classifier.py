@@ -0,0 +1,198 @@
+"""
+Learned emotion classifier backend with dynamic micro-batching.
+Concurrent requests are grouped for a few milliseconds and scored in a single
+model call on a worker thread; requests fall back to the lexicon analyzer if the
+model is unavailable or does not answer in time.
+"""
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .config import settings
+from .sentiment import analyze_sentiment
+
+try:
+    import joblib
+except ImportError:  # scikit-learn/joblib are optional, only needed for the classifier backend
+    joblib = None
+
+logger = logging.getLogger(__name__)
+
+Prediction = Dict[str, float]
+
+
+class MicroBatcher:
+    """
+    Collect concurrent predictions into batches of up to max_batch items.
+
+    A batch is dispatched as soon as it is full or max_wait_ms after its first item
+    arrived, whichever comes first. Inference runs on a single worker thread so the
+    event loop keeps serving requests while the model is busy.
+    """
+
+    def __init__(self, predict: Callable[[List[str]], List[Prediction]],
+                 max_batch: int = 16, max_wait_ms: float = 5.0):
+        self.predict = predict
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait_ms / 1000
+        self.batches = 0
+        self.items = 0
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="classifier")
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _ensure_running(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._task is None or self._task.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._run())
+
+    async def submit(self, text: str) -> Prediction:
+        """Queue one text for the next batch and wait for its prediction."""
+        self._ensure_running()
+        future = self._loop.create_future()
+        self._queue.put_nowait((text, future))
+        return await future
+
+    async def _collect(self) -> List[Tuple[str, asyncio.Future]]:
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - self._loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._collect()
+            # Requests that already timed out and fell back are not worth scoring
+            pending = [(text, future) for text, future in batch if not future.done()]
+            if not pending:
+                continue
+
+            texts = [text for text, _ in pending]
+            try:
+                predictions = await self._loop.run_in_executor(self._executor, self.predict, texts)
+            except Exception as e:
+                logger.error("Classifier batch of %d failed: %s", len(texts), e)
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.items += len(texts)
+            for (_, future), prediction in zip(pending, predictions):
+                if not future.done():
+                    future.set_result(prediction)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0
+        }
+
+
+def model_predictor(model: Any) -> Callable[[List[str]], List[Prediction]]:
+    """
+    Wrap a scikit-learn style model exposing predict_proba() and classes_.
+
+    Args:
+        model: Fitted classifier or pipeline that accepts raw text
+
+    Returns:
+        Function mapping a batch of texts to per-class probability dictionaries
+    """
+    classes = [str(label) for label in model.classes_]
+
+    def predict(texts: List[str]) -> List[Prediction]:
+        return [
+            {label: float(probability) for label, probability in zip(classes, row)}
+            for row in model.predict_proba(texts)
+        ]
+
+    return predict
+
+
+def load_classifier() -> Optional[MicroBatcher]:
+    """
+    Load the configured model and wrap it in a micro-batcher.
+
+    Returns:
+        MicroBatcher, or None if the classifier backend is off or the model cannot be loaded
+    """
+    if settings.sentiment_backend.lower() != "classifier":
+        return None
+    if joblib is None:
+        logger.warning("joblib is not installed, using lexicon sentiment backend")
+        return None
+    if not settings.classifier_model_path:
+        logger.warning("CLASSIFIER_MODEL_PATH not set, using lexicon sentiment backend")
+        return None
+
+    try:
+        model = joblib.load(settings.classifier_model_path)
+    except Exception as e:
+        logger.error("Failed to load classifier model %s: %s", settings.classifier_model_path, e)
+        return None
+
+    return MicroBatcher(
+        model_predictor(model),
+        max_batch=settings.classifier_max_batch,
+        max_wait_ms=settings.classifier_max_wait_ms
+    )
+
+
+# Global batcher, resolved once at import time
+batcher = load_classifier()
+
+
+async def classify_sentiment(text: str, classifier: Optional[MicroBatcher] = None) -> Dict[str, Any]:
+    """
+    Analyze text with the learned classifier, falling back to the lexicon analyzer.
+
+    Args:
+        text: Input text to analyze
+        classifier: Batcher to use (defaults to the global one)
+
+    Returns:
+        Same dictionary shape as analyze_sentiment(), with emotion fields taken from
+        the model and a "backend" key naming the analyzer that produced them
+    """
+    classifier = classifier or batcher
+
+    # The lexicon pass is cheap and provides the score/hits the model does not
+    result = analyze_sentiment(text)
+    result["backend"] = "lexicon"
+    if classifier is None or not text or not text.strip():
+        return result
+
+    try:
+        prediction = await asyncio.wait_for(
+            classifier.submit(text),
+            timeout=settings.classifier_timeout_ms / 1000
+        )
+    except asyncio.TimeoutError:
+        logger.warning("Classifier timed out, using lexicon result")
+        return result
+    except Exception as e:
+        logger.warning("Classifier failed, using lexicon result: %s", e)
+        return result
+
+    emotion, confidence = max(prediction.items(), key=lambda item: item[1])
+    result.update({
+        "emotion": emotion,
+        "emotion_confidence": round(confidence, 4),
+        "emotion_scores": {label: round(score, 4) for label, score in prediction.items()},
+        "backend": "classifier"
+    })
+    return result
@@ -4,29 +4,98 @@ Supports multiple LLM providers with fallback to mock for local development.
 """
 import os
 from pydantic_settings import BaseSettings
-from pydantic import ConfigDict
-from typing import Optional
+from pydantic import ConfigDict, Field
+from typing import Dict, List, Optional
 
 class Settings(BaseSettings):
     """Application settings loaded from environment variables."""
     
     # LLM Provider Configuration
-    provider: str = "mock"  # Options: "mock", "gemini", "perplexity"
+    provider: str = "mock"  # Options: "mock", "gemini", "perplexity", "local"
     gemini_model: str = "gemini-2.0-flash-002"  # Default Gemini model; override with GEMINI_MODEL
     
     # API Keys (set these in production)
     gemini_api_key: Optional[str] = None
     perplexity_api_key: Optional[str] = None
     
+    # Local OpenAI-compatible server (Ollama, llama.cpp server)
+    local_llm_base_url: str = "http://localhost:11434/v1"
+    local_llm_model: str = "llama3.1:8b"
+    local_llm_api_key: Optional[str] = None  # Only needed if the local server checks keys
+    
     # Application Settings
     app_name: str = "MH Companion Minimal"
+    environment: str = "development"  # "production" leaves debug payloads out unless requested
     debug: bool = False
     log_level: str = "INFO"
+    log_json: bool = True  # Emit one JSON object per log line
+    log_queue_size: int = 10000  # Records buffered for the background log writer
+    log_sampling: Dict[str, float] = {}  # Logger name -> fraction of DEBUG/INFO records kept
     
     # Server Configuration
     host: str = "0.0.0.0"
     port: int = 8000
+    compression_min_size: int = 500  # Responses smaller than this many bytes are sent uncompressed
+
+    # Provider capacity scheduling
+    provider_max_concurrency: int = 8  # Provider calls in flight at once
+    scheduler_queue_size: int = 100  # Waiting requests allowed per priority level
+    scheduler_aging_seconds: float = 2.0  # Each interval waited raises a request one priority level
+    risk_terms: List[str] = [  # Words or phrases that mark a message as urgent
+        "hopeless", "despair", "worthless", "suicidal", "suicide", "numb",
+        "devastated", "heartbroken", "trapped", "kill myself", "end it all",
+        "want to die", "self harm", "feel empty", "feel so empty", "feeling empty",
+        "all alone", "so alone", "feel alone", "feeling alone"
+    ]
     
+    # Sentiment backend
+    sentiment_backend: str = "lexicon"  # Options: "lexicon", "classifier"
+    classifier_model_path: Optional[str] = None  # joblib file holding a scikit-learn pipeline
+    classifier_max_batch: int = 16  # Largest batch handed to the model at once
+    classifier_max_wait_ms: float = 5.0  # How long to hold a batch open for more requests
+    classifier_timeout_ms: float = 100.0  # Fall back to the lexicon after this long
+
+    # Near-duplicate reply cache (one cache shared by all users and sessions)
+    reply_cache_enabled: bool = False
+    reply_cache_threshold: float = 0.9  # Minimum SimHash similarity (0-1) to reuse a reply
+    reply_cache_max_entries: int = 1000
+    reply_cache_ttl_seconds: float = 3600.0
+    reply_cache_min_score: int = -2  # Messages scoring at or below this always get a fresh reply
+
+    # Write-behind analytics store
+    analytics_enabled: bool = True
+    analytics_db_path: str = "analytics.db"
+    analytics_buffer_size: int = 10000  # Records held in memory before new ones are dropped
+    analytics_batch_size: int = 500  # Buffered records that trigger an early flush
+    analytics_flush_interval_seconds: float = 2.0
+
+    # Live-typing analysis
+    live_max_chars: int = 5000  # Longest text a live-typing buffer may hold
+
+    # Per-session mood trends
+    mood_window_size: int = Field(default=20, ge=1)  # Messages kept in each session's rolling window
+    mood_ema_alpha: float = 0.3  # Weight of the newest message in moving averages
+    mood_session_ttl_seconds: float = 3600.0  # Idle sessions are evicted after this long
+    mood_max_sessions: int = 10000
+
+    # Startup warm-up gating /ready
+    warmup_enabled: bool = True
+    warmup_provider_timeout_seconds: float = 5.0  # Longest wait for the provider connection check
+
+    # Traffic capture for load replay
+    capture_enabled: bool = False
+    capture_dir: str = "captures"
+    capture_text: bool = False  # Store raw message text; by default only a keyed hash and length are kept
+    capture_hash_key: Optional[str] = None  # HMAC key for message hashes; random per process if unset
+    capture_max_bytes: int = 10_000_000  # Rotate capture files at this size
+    capture_backup_count: int = 5
+
+    # On-demand profiling (disabled unless a sample rate or token is set)
+    profiling_sample_rate: float = 0.0  # Fraction of requests to profile, 0-1
+    profiling_token: Optional[str] = None  # Requests sending a matching X-Profile-Token are profiled
+    profiling_dir: str = "profiles"
+    profiling_max_artifacts: int = 50
+
     model_config = ConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
@@ -43,16 +112,16 @@ def get_provider_status() -> dict:
     Returns:
         Dictionary showing configuration status of each provider
     """
+    # Imported here because the adapter itself depends on settings
+    from .llm_adapter import PROVIDERS
+    
     status = {
-        "mock": {"available": True, "configured": True},
-        "gemini": {
-            "available": bool(settings.gemini_api_key),
-            "configured": bool(settings.gemini_api_key and len(settings.gemini_api_key) > 10)
-        },
-        "perplexity": {
-            "available": bool(settings.perplexity_api_key),
-            "configured": bool(settings.perplexity_api_key and len(settings.perplexity_api_key) > 10)
+        name: {
+            "available": provider.is_available(),
+            "configured": provider.is_configured(),
+            "capabilities": provider.capabilities
         }
+        for name, provider in PROVIDERS.items()
     }
     return status
 
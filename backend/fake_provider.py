@@ -0,0 +1,115 @@
+"""
+Fake OpenAI-compatible LLM server for tests and load replay.
+Answers /v1/chat/completions (plain and streaming) and /v1/models on localhost
+with a canned reply and an optional artificial latency, without any network egress.
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional, Tuple
+
+DEFAULT_REPLY = "I hear you, and I'm here with you."
+
+
+class FakeProviderHandler(BaseHTTPRequestHandler):
+    """Request handler; behaviour comes from attributes set on the server."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body: dict) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json(200, {"object": "list", "data": [{"id": "fake-model", "object": "model"}]})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        self.server.requests += 1
+
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": "not found"})
+            return
+
+        delay = self.server.latency()
+        if delay > 0:
+            time.sleep(delay)
+
+        if self.server.status != 200:
+            self._send_json(self.server.status, {"error": "fake failure"})
+            return
+
+        reply = self.server.reply
+        if payload.get("stream"):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            for word in reply.split(" "):
+                chunk = {"choices": [{"delta": {"content": word + " "}}]}
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.close_connection = True
+            return
+
+        self._send_json(200, {
+            "object": "chat.completion",
+            "model": payload.get("model", "fake-model"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": reply}, "finish_reason": "stop"}]
+        })
+
+
+def start_fake_provider(host: str = "127.0.0.1", port: int = 0, reply: str = DEFAULT_REPLY,
+                        latency: Optional[Callable[[], float]] = None,
+                        status: int = 200) -> Tuple[ThreadingHTTPServer, str]:
+    """
+    Start the fake server on a background thread.
+
+    Args:
+        host: Interface to bind, loopback by default
+        port: Port to bind, 0 picks a free one
+        reply: Reply text returned for every completion
+        latency: Function returning the delay in seconds for each request
+        status: HTTP status for completions; non-200 simulates provider failures
+
+    Returns:
+        Tuple of (server, base_url); call server.shutdown() to stop it
+    """
+    server = ThreadingHTTPServer((host, port), FakeProviderHandler)
+    server.daemon_threads = True
+    server.reply = reply
+    server.latency = latency or (lambda: 0.0)
+    server.status = status
+    server.requests = 0
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a fake OpenAI-compatible LLM server")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server, base_url = start_fake_provider(port=args.port, latency=lambda: args.latency_ms / 1000)
+    print(f"Fake provider listening on {base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,195 @@
+"""
+Incremental sentiment analysis for live typing.
+The text is kept as alternating runs of word and non-word characters with their
+tokens and running lexicon counts. An edit only re-tokenizes the runs it touches,
+so the work per keystroke depends on the size of the edit, not of the message.
+"""
+import re
+from typing import Any, Dict, List, Tuple
+
+from .sentiment import EMOTION_LEXICONS, NEGATIVE_WORDS, NON_WORD_RE, POSITIVE_WORDS, primary_emotion
+
+_RUN_RE = re.compile(r"\w+|\W+")
+_WORD_CHAR_RE = re.compile(r"\w")
+
+# Emotions each lexicon word counts toward
+_TOKEN_EMOTIONS: Dict[str, Tuple[str, ...]] = {}
+for _emotion, _lexicon in EMOTION_LEXICONS.items():
+    for _word in _lexicon:
+        _TOKEN_EMOTIONS[_word] = _TOKEN_EMOTIONS.get(_word, ()) + (_emotion,)
+
+
+# Same normalization as analyze_sentiment(), applied to one run at a time
+def _tokenize(run: str) -> Tuple[str, ...]:
+    return tuple(NON_WORD_RE.sub(" ", run.lower()).split())
+
+
+def _is_word(run: str) -> bool:
+    return _WORD_CHAR_RE.match(run) is not None
+
+
+def _non_space(run: str) -> int:
+    return sum(1 for char in run if not char.isspace())
+
+
+class LiveAnalysis:
+    """
+    Text buffer that keeps analyze_sentiment() results current under edits.
+
+    Locating an edit walks from the previous edit position, which is a step or two
+    while the user types in one place. result() matches analyze_sentiment() on
+    the full text exactly.
+    """
+
+    def __init__(self, text: str = ""):
+        self._runs: List[str] = []
+        self._run_tokens: List[Tuple[str, ...]] = []
+        self._length = 0
+        self._non_space = 0
+        self._token_counts: Dict[str, int] = {}
+        self._pos_count = 0
+        self._neg_count = 0
+        self._emotion_scores: Dict[str, int] = dict.fromkeys(EMOTION_LEXICONS, 0)
+        self._cursor = (0, 0)  # (run index, offset where that run starts)
+        if text:
+            self.apply_edit(0, 0, text)
+
+    def __len__(self) -> int:
+        return self._length
+
+    @property
+    def text(self) -> str:
+        return "".join(self._runs)
+
+    def _locate(self, position: int) -> Tuple[int, int]:
+        """Index and start offset of the run containing position (len(runs) at the end)."""
+        index, start = self._cursor
+        while index > 0 and start > position:
+            index -= 1
+            start -= len(self._runs[index])
+        while index < len(self._runs) and start + len(self._runs[index]) <= position:
+            start += len(self._runs[index])
+            index += 1
+        return index, start
+
+    def _count(self, run: str, tokens: Tuple[str, ...], sign: int) -> None:
+        self._non_space += sign * _non_space(run)
+        for token in tokens:
+            if token in POSITIVE_WORDS:
+                self._pos_count += sign
+            if token in NEGATIVE_WORDS:
+                self._neg_count += sign
+
+            count = self._token_counts.get(token, 0) + sign
+            if count:
+                self._token_counts[token] = count
+            else:
+                del self._token_counts[token]
+
+            # Emotion scores count distinct words, so only first/last occurrences matter
+            if (sign > 0 and count == 1) or (sign < 0 and count == 0):
+                for emotion in _TOKEN_EMOTIONS.get(token, ()):
+                    self._emotion_scores[emotion] += sign
+
+    def apply_edit(self, position: int, delete: int = 0, insert: str = "") -> None:
+        """
+        Replace `delete` characters at `position` with `insert`.
+
+        Args:
+            position: Character offset of the edit
+            delete: Number of characters removed
+            insert: Text inserted in their place
+
+        Raises:
+            ValueError: If the edit falls outside the current text
+        """
+        if position < 0 or delete < 0 or position + delete > self._length:
+            raise ValueError(f"Edit {position}+{delete} outside text of length {self._length}")
+        if not delete and not insert:
+            return
+
+        first, first_start = self._locate(position)
+        last, _ = self._locate(position + delete)
+
+        # Take one neighbouring run on the left so edits at a run boundary can merge
+        low = first - 1 if first > 0 else first
+        low_start = first_start - len(self._runs[low]) if low < first else first_start
+        high = min(last + 1, len(self._runs))
+
+        # Widen the window until its edges line up with run boundaries outside it
+        while True:
+            window = "".join(self._runs[low:high])
+            offset = position - low_start
+            new_text = window[:offset] + insert + window[offset + delete:]
+            runs = _RUN_RE.findall(new_text)
+            if low > 0 and (not runs or _is_word(runs[0]) == _is_word(self._runs[low - 1])):
+                low -= 1
+                low_start -= len(self._runs[low])
+                continue
+            if high < len(self._runs) and (not runs or _is_word(runs[-1]) == _is_word(self._runs[high])):
+                high += 1
+                continue
+            break
+
+        for run, tokens in zip(self._runs[low:high], self._run_tokens[low:high]):
+            self._count(run, tokens, -1)
+        new_tokens = [_tokenize(run) for run in runs]
+        for run, tokens in zip(runs, new_tokens):
+            self._count(run, tokens, 1)
+
+        self._runs[low:high] = runs
+        self._run_tokens[low:high] = new_tokens
+        self._length += len(insert) - delete
+        self._cursor = (low, low_start)
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Live indicator state, cheap enough to send after every edit.
+
+        Returns:
+            Score, label, hit counts and emotion fields, without the hit lists
+        """
+        if not self._non_space:
+            return {
+                "score": 0,
+                "pos_count": 0,
+                "neg_count": 0,
+                "label": "neu",
+                "emotion": "neutral",
+                "emotion_confidence": 0.0,
+                "emotion_scores": {}
+            }
+
+        score = self._pos_count - self._neg_count
+        emotion, confidence = primary_emotion(self._emotion_scores, len(self._token_counts))
+        return {
+            "score": score,
+            "pos_count": self._pos_count,
+            "neg_count": self._neg_count,
+            "label": "pos" if score > 0 else "neg" if score < 0 else "neu",
+            "emotion": emotion,
+            "emotion_confidence": confidence,
+            "emotion_scores": dict(self._emotion_scores)
+        }
+
+    def result(self) -> Dict[str, Any]:
+        """Full analyze_sentiment()-compatible result, including ordered hit lists."""
+        summary = self.summary()
+        pos_hits, neg_hits = [], []
+        if self._non_space:
+            for tokens in self._run_tokens:
+                for token in tokens:
+                    if token in POSITIVE_WORDS:
+                        pos_hits.append(token)
+                    if token in NEGATIVE_WORDS:
+                        neg_hits.append(token)
+
+        return {
+            "score": summary["score"],
+            "pos_hits": pos_hits,
+            "neg_hits": neg_hits,
+            "label": summary["label"],
+            "emotion": summary["emotion"],
+            "emotion_confidence": summary["emotion_confidence"],
+            "emotion_scores": summary["emotion_scores"]
+        }
@@ -1,17 +1,126 @@
 """
 LLM Adapter module for routing requests to different AI providers.
-Supports mock, gemini, and perplexity providers with environment-based configuration.
+Providers register themselves in a registry; the configured one is resolved once
+at startup and every reply is dispatched to it directly.
 """
 import logging
 import random
 import httpx
 import asyncio
-from typing import Dict, Any
+import json
+from typing import AsyncIterator, Dict, Any, Optional, Tuple
 
 from .config import settings
 
 logger = logging.getLogger(__name__)
 
+# Maximum characters of user input forwarded to a provider, to control costs
+MAX_INPUT_CHARS = 500
+
+SYSTEM_PROMPT = "You are a compassionate mental health companion. Provide supportive, empathetic responses under 100 words. Focus on validation, understanding, and gentle guidance."
+
+GEMINI_PROMPT_TEMPLATE = """You are a compassionate, empathetic mental health companion and active listener. Your role is to:
+
+- Provide emotional support and validation
+- Use active listening techniques  
+- Offer gentle, non-judgmental guidance
+- Encourage self-reflection and coping strategies
+- Keep responses warm, supportive, and under 150 words
+- Never provide medical advice or diagnose
+- Focus on the person's feelings and experiences
+
+Respond with empathy, understanding, and genuine care.
+
+User message: {text}
+
+Your supportive response:"""
+
+
+class LLMProvider:
+    """
+    Interface every reply provider implements.
+
+    generate() is required; agenerate() and stream() default to running generate()
+    on a worker thread and yielding its reply as a single chunk.
+    """
+
+    name = ""
+    capabilities: Dict[str, bool] = {"sync": True, "async": False, "streaming": False, "requires_network": False}
+
+    def is_available(self) -> bool:
+        """True if the provider has the credentials or endpoint it needs."""
+        return True
+
+    def is_configured(self) -> bool:
+        """True if the provider looks fully configured for use."""
+        return self.is_available()
+
+    def generate(self, text: str) -> str:
+        raise NotImplementedError
+
+    async def agenerate(self, text: str) -> str:
+        return await asyncio.to_thread(self.generate, text)
+
+    async def stream(self, text: str) -> AsyncIterator[str]:
+        yield await self.agenerate(text)
+
+    async def warm_up(self) -> None:
+        """Open and check connections before the first reply; raises if unusable."""
+
+    def close(self) -> None:
+        """Release pooled connections."""
+
+    async def aclose(self) -> None:
+        """Release pooled connections from the event loop that opened them."""
+        self.close()
+
+
+PROVIDERS: Dict[str, LLMProvider] = {}
+
+
+def register_provider(provider: LLMProvider) -> LLMProvider:
+    """
+    Add a provider to the registry under its name.
+
+    Args:
+        provider: Provider instance
+
+    Returns:
+        The same provider, so this can wrap a module-level instantiation
+    """
+    PROVIDERS[provider.name] = provider
+    return provider
+
+
+def resolve_provider(name: Optional[str] = None) -> LLMProvider:
+    """
+    Look up a provider by name, falling back to mock for unknown names.
+
+    Args:
+        name: Provider name (defaults to settings.provider)
+
+    Returns:
+        Registered provider instance
+    """
+    name = (name or settings.provider).lower()
+    provider = PROVIDERS.get(name)
+    if provider is None:
+        logger.warning("Unknown provider '%s', falling back to mock", name)
+        provider = PROVIDERS["mock"]
+    return provider
+
+
+def activate_provider(name: Optional[str] = None) -> LLMProvider:
+    """Resolve a provider and make it the target of generate_reply()."""
+    global _active_provider
+    _active_provider = resolve_provider(name)
+    return _active_provider
+
+
+def _trim(text: str) -> str:
+    return text[:MAX_INPUT_CHARS] if len(text) > MAX_INPUT_CHARS else text
+
+
 def generate_reply(text: str) -> str:
     """
     Generate a reply using the configured LLM provider.
@@ -22,20 +131,32 @@ def generate_reply(text: str) -> str:
     Returns:
         Generated reply string
     """
-    # Trim input to 500 characters max to control costs
-    trimmed_text = text[:500] if len(text) > 500 else text
-    
-    provider = settings.provider.lower()
-    
-    if provider == "mock":
-        return _mock_generate_reply(trimmed_text)
-    elif provider == "gemini":
-        return _gemini_generate_reply(trimmed_text)
-    elif provider == "perplexity":
-        return _perplexity_generate_reply(trimmed_text)
-    else:
-        logger.warning(f"Unknown provider '{provider}', falling back to mock")
-        return _mock_generate_reply(trimmed_text)
+    return _active_provider.generate(_trim(text))
+
+
+async def agenerate_reply(text: str) -> str:
+    """Async variant of generate_reply() that does not block the event loop."""
+    return await _active_provider.agenerate(_trim(text))
+
+
+async def stream_reply(text: str) -> AsyncIterator[str]:
+    """Yield reply chunks from the configured provider as they arrive."""
+    async for chunk in _active_provider.stream(_trim(text)):
+        yield chunk
+
+
+class MockProvider(LLMProvider):
+    """Rule-based replies for local development and tests."""
+
+    name = "mock"
+    capabilities = {"sync": True, "async": True, "streaming": False, "requires_network": False}
+
+    def generate(self, text: str) -> str:
+        return _mock_generate_reply(text)
+
+    async def agenerate(self, text: str) -> str:
+        # Pure CPU and fast, not worth a thread hop
+        return _mock_generate_reply(text)
 
 def _mock_generate_reply(text: str) -> str:
     """
@@ -89,53 +210,183 @@ def _mock_generate_reply(text: str) -> str:
     
     return random.choice(default_responses)
 
-def _gemini_generate_reply(text: str) -> str:
+
+class HTTPProvider(LLMProvider):
     """
-    Generate reply using Google's Gemini Pro API.
-    
-    Args:
-        text: Input text from user
-        
-    Returns:
-        Generated reply from Gemini or fallback message on error
+    Base for providers reached over HTTP.
+
+    Subclasses describe the request and how to read the reply; this class owns the
+    pooled sync/async clients and the shared error handling. Errors never propagate:
+    they are logged and the user gets the provider's fallback message.
     """
-    if not settings.gemini_api_key:
-        logger.error("GEMINI_API_KEY not found in environment")
-        return "I'm here with you, though I couldn't reach Gemini right now."
-    
-    model = settings.gemini_model or "gemini-2.0-flash-002"
-    logger.debug(f"Using Gemini model: {model}")
-    
-    try:
-        # Prepare the request (Gemini uses API key in URL, not header)
-        url = f"https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent?key={settings.gemini_api_key}"
-        headers = {
-            "Content-Type": "application/json"
-        }
-        
-        # Create a comprehensive prompt that includes system instruction and user message
-        full_prompt = f"""You are a compassionate, empathetic mental health companion and active listener. Your role is to:
 
-- Provide emotional support and validation
-- Use active listening techniques  
-- Offer gentle, non-judgmental guidance
-- Encourage self-reflection and coping strategies
-- Keep responses warm, supportive, and under 150 words
-- Never provide medical advice or diagnose
-- Focus on the person's feelings and experiences
+    label = ""
+    capabilities = {"sync": True, "async": True, "streaming": False, "requires_network": True}
+    timeout = 10.0
 
-Respond with empathy, understanding, and genuine care.
+    def __init__(self):
+        self._client: Optional[httpx.Client] = None
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._async_loop: Optional[asyncio.AbstractEventLoop] = None
 
-User message: {text}
+    @property
+    def fallback_reply(self) -> str:
+        return f"I'm here with you, though I couldn't reach {self.label} right now."
 
-Your supportive response:"""
+    @property
+    def client(self) -> httpx.Client:
+        if self._client is None:
+            self._client = httpx.Client(timeout=self.timeout)
+        return self._client
+
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        # Async clients are bound to the event loop that first used them
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop:
+            self._discard_async_client()
+            self._async_client = httpx.AsyncClient(timeout=self.timeout)
+            self._async_loop = loop
+        return self._async_client
+
+    def missing_config(self) -> Optional[str]:
+        """Name of the missing setting that prevents calls, or None."""
+        return None
+
+    def build_request(self, text: str, stream: bool = False) -> Tuple[str, Dict[str, str], Dict[str, Any]]:
+        """Return (url, headers, payload) for a reply request."""
+        raise NotImplementedError
+
+    def parse_response(self, data: Dict[str, Any]) -> Optional[str]:
+        """Extract the reply text from a response body, None if it is malformed."""
+        raise NotImplementedError
+
+    def warm_up_request(self) -> Tuple[str, Dict[str, str]]:
+        """Return (url, headers) for a cheap GET that exercises DNS, TLS and auth."""
+        raise NotImplementedError
+
+    async def warm_up(self) -> None:
+        missing = self.missing_config()
+        if missing:
+            raise RuntimeError(f"{missing} not set")
+
+        # Goes through the pooled async client, so the connection stays open for replies
+        url, headers = self.warm_up_request()
+        response = await self.async_client.get(url, headers=headers)
+        # 404 only means the server has no listing endpoint; the connection still works.
+        # The URL is left out of the message since it may carry an API key.
+        if response.status_code in (401, 403) or response.status_code >= 500:
+            raise RuntimeError(f"{self.label} returned HTTP {response.status_code}")
+
+    def _handle_data(self, data: Dict[str, Any]) -> str:
+        reply = self.parse_response(data)
+        if reply is None:
+            logger.error("Unexpected %s response structure: %.300s", self.label, data)
+            return self.fallback_reply
+        logger.debug("%s response generated successfully: %.50s...", self.label, reply)
+        return reply
+
+    def _handle_error(self, error: Exception) -> str:
+        if isinstance(error, httpx.TimeoutException):
+            logger.error("%s API timeout", self.label)
+        elif isinstance(error, httpx.HTTPStatusError):
+            logger.error("%s API HTTP error: %s - %.300s", self.label, error.response.status_code, error.response.text)
+        else:
+            logger.error("%s API error: %s", self.label, error)
+        return self.fallback_reply
+
+    def generate(self, text: str) -> str:
+        missing = self.missing_config()
+        if missing:
+            logger.error("%s not found in environment", missing)
+            return self.fallback_reply
+
+        try:
+            url, headers, payload = self.build_request(text)
+            response = self.client.post(url, headers=headers, json=payload)
+            response.raise_for_status()
+            return self._handle_data(response.json())
+        except Exception as e:
+            return self._handle_error(e)
+
+    async def agenerate(self, text: str) -> str:
+        missing = self.missing_config()
+        if missing:
+            logger.error("%s not found in environment", missing)
+            return self.fallback_reply
+
+        try:
+            url, headers, payload = self.build_request(text)
+            response = await self.async_client.post(url, headers=headers, json=payload)
+            response.raise_for_status()
+            return self._handle_data(response.json())
+        except Exception as e:
+            return self._handle_error(e)
+
+    def _discard_async_client(self) -> None:
+        """Drop the async client, closing it on its own loop if that loop is still running."""
+        client, loop = self._async_client, self._async_loop
+        self._async_client = None
+        self._async_loop = None
+        if client is None or loop is None or loop.is_closed() or not loop.is_running():
+            # A stopped loop cannot run aclose(); its sockets are freed with the client
+            return
+        try:
+            current = asyncio.get_running_loop()
+        except RuntimeError:
+            current = None
+        if loop is current:
+            loop.create_task(client.aclose())
+        else:
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+
+    def close(self) -> None:
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+        self._discard_async_client()
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+        if self._async_client is not None and self._async_loop is asyncio.get_running_loop():
+            client = self._async_client
+            self._async_client = None
+            self._async_loop = None
+            await client.aclose()
+        else:
+            self._discard_async_client()
+
+
+class GeminiProvider(HTTPProvider):
+    """Google Gemini generateContent API."""
+
+    name = "gemini"
+    label = "Gemini"
+
+    def is_available(self) -> bool:
+        return bool(settings.gemini_api_key)
+
+    def is_configured(self) -> bool:
+        return bool(settings.gemini_api_key and len(settings.gemini_api_key) > 10)
+
+    def missing_config(self) -> Optional[str]:
+        return None if settings.gemini_api_key else "GEMINI_API_KEY"
+
+    def build_request(self, text: str, stream: bool = False):
+        model = settings.gemini_model or "gemini-2.0-flash-002"
+        logger.debug("Using Gemini model: %s", model)
         
+        # Gemini uses API key in URL, not header
+        url = f"https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent?key={settings.gemini_api_key}"
+        headers = {"Content-Type": "application/json"}
         payload = {
             "contents": [
                 {
                     "parts": [
                         {
-                            "text": full_prompt
+                            "text": GEMINI_PROMPT_TEMPLATE.format(text=text)
                         }
                     ]
                 }
@@ -150,100 +401,202 @@ Your supportive response:"""
                 "topK": 40
             }
         }
-        
-        # Make synchronous HTTP request
-        with httpx.Client(timeout=10.0) as client:
-            response = client.post(url, headers=headers, json=payload)
-            response.raise_for_status()
-            
-            data = response.json()
+        return url, headers, payload
+
+    def parse_response(self, data: Dict[str, Any]) -> Optional[str]:
+        if ("candidates" in data and 
+            len(data["candidates"]) > 0 and 
+            "content" in data["candidates"][0] and
+            "parts" in data["candidates"][0]["content"] and
+            len(data["candidates"][0]["content"]["parts"]) > 0):
             
-            # Extract the generated text
-            if ("candidates" in data and 
-                len(data["candidates"]) > 0 and 
-                "content" in data["candidates"][0] and
-                "parts" in data["candidates"][0]["content"] and
-                len(data["candidates"][0]["content"]["parts"]) > 0):
-                
-                generated_text = data["candidates"][0]["content"]["parts"][0]["text"].strip()
-                logger.info(f"Gemini response generated successfully: {generated_text[:50]}...")
-                return generated_text
-            else:
-                logger.error(f"Unexpected Gemini response structure: {data}")
-                return "I'm here with you, though I couldn't reach Gemini right now."
-                
-    except httpx.TimeoutException:
-        logger.error("Gemini API timeout")
-        return "I'm here with you, though I couldn't reach Gemini right now."
-    except httpx.HTTPStatusError as e:
-        logger.error(f"Gemini API HTTP error: {e.response.status_code} - {e.response.text}")
-        return "I'm here with you, though I couldn't reach Gemini right now."
-    except Exception as e:
-        logger.error(f"Gemini API error: {str(e)}")
-        return "I'm here with you, though I couldn't reach Gemini right now."
+            return data["candidates"][0]["content"]["parts"][0]["text"].strip()
+        return None
 
-def _perplexity_generate_reply(text: str) -> str:
+    def warm_up_request(self):
+        # Model metadata lookup: authenticated but free
+        model = settings.gemini_model or "gemini-2.0-flash-002"
+        url = f"https://generativelanguage.googleapis.com/v1beta/models/{model}?key={settings.gemini_api_key}"
+        return url, {}
+
+
+class OpenAICompatibleProvider(HTTPProvider):
     """
-    Generate reply using Perplexity API.
-    
-    Args:
-        text: Input text from user
-        
-    Returns:
-        Generated reply from Perplexity or fallback message on error
+    Any server speaking the OpenAI chat completions API.
+    Supports token streaming over server-sent events.
     """
-    if not settings.perplexity_api_key:
-        logger.error("PERPLEXITY_API_KEY not found in environment")
-        return "I'm here with you, though I couldn't reach Perplexity right now."
-    
-    try:
-        # Prepare the request
-        url = "https://api.perplexity.ai/chat/completions"
-        headers = {
-            "Authorization": f"Bearer {settings.perplexity_api_key}",
-            "Content-Type": "application/json"
-        }
+
+    capabilities = {"sync": True, "async": True, "streaming": True, "requires_network": True}
+    max_tokens = 150
+
+    @property
+    def base_url(self) -> str:
+        raise NotImplementedError
+
+    @property
+    def model(self) -> str:
+        raise NotImplementedError
+
+    @property
+    def api_key(self) -> Optional[str]:
+        return None
+
+    def build_request(self, text: str, stream: bool = False):
+        url = f"{self.base_url.rstrip('/')}/chat/completions"
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
         
         payload = {
-            "model": "llama-3.1-sonar-small-128k-chat",
+            "model": self.model,
             "messages": [
                 {
                     "role": "system",
-                    "content": "You are a compassionate mental health companion. Provide supportive, empathetic responses under 100 words. Focus on validation, understanding, and gentle guidance."
+                    "content": SYSTEM_PROMPT
                 },
                 {
                     "role": "user", 
                     "content": text
                 }
             ],
-            "max_tokens": 150,
+            "max_tokens": self.max_tokens,
             "temperature": 0.7
         }
-        
-        # Make synchronous HTTP request
-        with httpx.Client(timeout=10.0) as client:
-            response = client.post(url, headers=headers, json=payload)
-            response.raise_for_status()
-            
-            data = response.json()
+        if stream:
+            payload["stream"] = True
+        return url, headers, payload
+
+    def parse_response(self, data: Dict[str, Any]) -> Optional[str]:
+        if ("choices" in data and 
+            len(data["choices"]) > 0 and 
+            "message" in data["choices"][0] and
+            "content" in data["choices"][0]["message"]):
             
-            # Extract the generated text
-            if ("choices" in data and 
-                len(data["choices"]) > 0 and 
-                "message" in data["choices"][0] and
-                "content" in data["choices"][0]["message"]):
-                
-                return data["choices"][0]["message"]["content"].strip()
-            else:
-                logger.error(f"Unexpected Perplexity response structure: {data}")
-                return "I'm here with you, though I couldn't reach Perplexity right now."
-                
-    except httpx.TimeoutException:
-        logger.error("Perplexity API timeout")
-        return "I'm here with you, though I couldn't reach Perplexity right now."
-    except httpx.HTTPStatusError as e:
-        logger.error(f"Perplexity API HTTP error: {e.response.status_code} - {e.response.text}")
-        return "I'm here with you, though I couldn't reach Perplexity right now."
-    except Exception as e:
-        logger.error(f"Perplexity API error: {str(e)}")
-        return "I'm here with you, though I couldn't reach Perplexity right now."
+            return data["choices"][0]["message"]["content"].strip()
+        return None
+
+    def warm_up_request(self):
+        headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+        return f"{self.base_url.rstrip('/')}/models", headers
+
+    async def stream(self, text: str) -> AsyncIterator[str]:
+        missing = self.missing_config()
+        if missing:
+            logger.error("%s not found in environment", missing)
+            yield self.fallback_reply
+            return
+
+        produced = False
+        try:
+            url, headers, payload = self.build_request(text, stream=True)
+            async with self.async_client.stream("POST", url, headers=headers, json=payload) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    choices = json.loads(data).get("choices") or [{}]
+                    chunk = choices[0].get("delta", {}).get("content")
+                    if chunk:
+                        produced = True
+                        yield chunk
+        except Exception as e:
+            fallback = self._handle_error(e)
+            if not produced:
+                yield fallback
+
+
+class PerplexityProvider(OpenAICompatibleProvider):
+    """Perplexity chat completions API."""
+
+    name = "perplexity"
+    label = "Perplexity"
+
+    base_url = "https://api.perplexity.ai"
+    model = "llama-3.1-sonar-small-128k-chat"
+
+    @property
+    def api_key(self) -> Optional[str]:
+        return settings.perplexity_api_key
+
+    def is_available(self) -> bool:
+        return bool(settings.perplexity_api_key)
+
+    def is_configured(self) -> bool:
+        return bool(settings.perplexity_api_key and len(settings.perplexity_api_key) > 10)
+
+    def missing_config(self) -> Optional[str]:
+        return None if settings.perplexity_api_key else "PERPLEXITY_API_KEY"
+
+
+class LocalLLMProvider(OpenAICompatibleProvider):
+    """
+    Self-hosted OpenAI-compatible server (Ollama, llama.cpp server, vLLM).
+    Only talks to LOCAL_LLM_BASE_URL, so replies never leave on-prem hardware.
+    """
+
+    name = "local"
+    label = "the local model"
+    capabilities = {"sync": True, "async": True, "streaming": True, "requires_network": False}
+    timeout = 30.0  # CPU inference is slower than hosted APIs
+    max_tokens = 200
+
+    @property
+    def base_url(self) -> str:
+        return settings.local_llm_base_url
+
+    @property
+    def model(self) -> str:
+        return settings.local_llm_model
+
+    @property
+    def api_key(self) -> Optional[str]:
+        return settings.local_llm_api_key
+
+    def is_available(self) -> bool:
+        return bool(settings.local_llm_base_url)
+
+    def missing_config(self) -> Optional[str]:
+        return None if settings.local_llm_base_url else "LOCAL_LLM_BASE_URL"
+
+
+register_provider(MockProvider())
+register_provider(GeminiProvider())
+register_provider(PerplexityProvider())
+register_provider(LocalLLMProvider())
+
+# Resolved once at import; generate_reply() dispatches straight to it
+_active_provider = resolve_provider()
+
+
+def get_active_provider() -> LLMProvider:
+    """Provider currently serving generate_reply()."""
+    return _active_provider
+
+
+def _gemini_generate_reply(text: str) -> str:
+    """
+    Generate reply using Google's Gemini Pro API.
+    
+    Args:
+        text: Input text from user
+        
+    Returns:
+        Generated reply from Gemini or fallback message on error
+    """
+    return PROVIDERS["gemini"].generate(text)
+
+
+def _perplexity_generate_reply(text: str) -> str:
+    """
+    Generate reply using Perplexity API.
+    
+    Args:
+        text: Input text from user
+        
+    Returns:
+        Generated reply from Perplexity or fallback message on error
+    """
+    return PROVIDERS["perplexity"].generate(text)
@@ -2,25 +2,56 @@
 FastAPI application main module.
 Provides /health and /analyze endpoints with sentiment analysis and LLM responses.
 """
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Header, Query, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 import logging
-from typing import Dict, Any
+import time
+from typing import Dict, Any, Optional
 
-from .llm_adapter import generate_reply
+from .llm_adapter import agenerate_reply, get_active_provider
 from .sentiment import analyze_sentiment
 from .config import settings
+from .classifier import classify_sentiment, batcher as classifier_batcher
+from .reply_cache import is_cacheable, reply_cache
+from .analytics import analytics_store
+from .mood import mood_tracker
+from .responses import add_compression, etag_response, select_fields, shaped_json, validate_fields
+from .live import LiveAnalysis
+from .scheduler import SchedulerFull, priority_for, provider_scheduler
+from .logging_setup import configure_logging, dropped_log_records
+from .profiling import ProfilingMiddleware, profiling_enabled, token_matches, list_profiles
+from .traffic import TrafficCaptureMiddleware, note_provider_latency, stop_capture
+from .readiness import readiness
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+configure_logging()
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start background workers on startup and flush them on shutdown."""
+    if settings.analytics_enabled:
+        analytics_store.start()
+    # Warm-up runs in the background so /health answers while /ready reports 503
+    readiness.start()
+    yield
+    await readiness.stop()
+    # Close the provider's pooled connections (opened during warm-up) on this loop
+    await get_active_provider().aclose()
+    if settings.analytics_enabled:
+        await analytics_store.stop()
+    if settings.capture_enabled:
+        stop_capture()
+
 # Initialize FastAPI app
 app = FastAPI(
     title="MH Companion Minimal",
     description="Minimal FastAPI app with sentiment analysis and LLM integration",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware to allow frontend connections
@@ -32,8 +63,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Profiling middleware is only installed when enabled, so it costs nothing otherwise
+if profiling_enabled():
+    app.add_middleware(ProfilingMiddleware)
+
+# Record anonymized request metadata for load replay (see backend/replay.py)
+if settings.capture_enabled:
+    app.add_middleware(TrafficCaptureMiddleware)
+
+# Compress larger responses (Brotli when brotli-asgi is installed, gzip otherwise)
+add_compression(app)
+
 class AnalyzeRequest(BaseModel):
     text: str
+    session_id: Optional[str] = None  # Groups messages of one conversation for mood trends
 
 class AnalyzeResponse(BaseModel):
     provider: str
@@ -41,35 +84,85 @@ class AnalyzeResponse(BaseModel):
     emotion: str
     emotion_confidence: float
     reply: str
-    debug: Dict[str, Any]
+    debug: Optional[Dict[str, Any]] = None  # Omitted by default in production, request via fields=debug
+
+def _default_excluded_fields() -> tuple:
+    return ("debug",) if settings.environment.lower() == "production" else ()
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint for monitoring."""
     return {"status": "ok"}
 
-@app.post("/analyze", response_model=AnalyzeResponse)
-async def analyze_text(request: AnalyzeRequest):
+@app.get("/ready")
+async def ready_check():
+    """Readiness probe: 503 until startup warm-up has finished, then per-step timings."""
+    return JSONResponse(status_code=200 if readiness.ready else 503, content=readiness.status())
+
+@app.post("/analyze", response_model=AnalyzeResponse, response_model_exclude_none=True)
+async def analyze_text(
+    request: AnalyzeRequest,
+    fields: Optional[str] = Query(default=None),
+    x_fields: Optional[str] = Header(default=None)
+):
     """
     Analyze user text for sentiment and generate LLM response.
     
     Args:
         request: JSON with 'text' field containing user input
+        fields: Optional comma-separated response fields (also accepted as X-Fields header)
         
     Returns:
         JSON with provider, sentiment, reply, and debug information
     """
+    # Reject a bad selection before the pipeline spends a provider call on it
+    validate_fields(fields or x_fields, AnalyzeResponse.model_fields)
+    response = await _process_message(request)
+    return shaped_json(response.model_dump(), fields or x_fields, _default_excluded_fields())
+
+async def _process_message(request: AnalyzeRequest, sentiment_result: Optional[Dict[str, Any]] = None) -> AnalyzeResponse:
+    """
+    Run the full analyze pipeline for one message.
+    
+    Args:
+        request: Message text and optional session id
+        sentiment_result: Precomputed lexicon analysis (e.g. from live typing), if any
+        
+    Returns:
+        Complete AnalyzeResponse before field selection
+    """
+    started = time.perf_counter()
     try:
         if not request.text.strip():
             raise HTTPException(status_code=400, detail="Text cannot be empty")
         
-        logger.info(f"Analyzing text with provider: {settings.provider}")
+        logger.info("Analyzing text with provider: %s", settings.provider)
         
         # Analyze sentiment
-        sentiment_result = analyze_sentiment(request.text)
+        if settings.sentiment_backend.lower() == "classifier":
+            sentiment_result = await classify_sentiment(request.text)
+        elif sentiment_result is None:
+            sentiment_result = analyze_sentiment(request.text)
+        
+        if request.session_id:
+            mood_tracker.update(request.session_id, sentiment_result)
         
-        # Generate LLM reply
-        llm_reply = generate_reply(request.text)
+        # Generate LLM reply, reusing a cached one for near-duplicate messages.
+        # Crisis and strongly negative messages bypass the shared cache entirely.
+        priority = priority_for(request.text, sentiment_result)
+        use_cache = settings.reply_cache_enabled and is_cacheable(priority, sentiment_result)
+        llm_reply = None
+        provider_latency_ms = None
+        if use_cache:
+            llm_reply = reply_cache.lookup(request.text, sentiment_result["emotion"])
+        if llm_reply is None:
+            # Wait for provider capacity, most distressed users first
+            provider_started = time.perf_counter()
+            llm_reply = await provider_scheduler.run(priority, agenerate_reply, request.text)
+            provider_latency_ms = (time.perf_counter() - provider_started) * 1000
+            note_provider_latency(provider_latency_ms)
+            if use_cache:
+                reply_cache.store(request.text, sentiment_result["emotion"], llm_reply)
         
         # Build response
         response = AnalyzeResponse(
@@ -86,48 +179,178 @@ async def analyze_text(request: AnalyzeRequest):
             }
         )
         
+        if settings.analytics_enabled:
+            analytics_store.record(
+                sentiment_result,
+                provider=settings.provider,
+                latency_ms=(time.perf_counter() - started) * 1000,
+                provider_latency_ms=provider_latency_ms
+            )
+        
         return response
         
     except HTTPException:
         # Re-raise HTTP exceptions to preserve status codes
         raise
+    except SchedulerFull:
+        logger.warning("Provider queue full, rejecting request")
+        raise HTTPException(status_code=503, detail="Service busy, please try again shortly")
     except Exception as e:
-        logger.error(f"Error processing request: {str(e)}")
+        logger.error("Error processing request: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @app.get("/")
-async def root():
+async def root(request: Request):
     """Root endpoint with basic information."""
-    return {
+    return etag_response(request, {
         "message": "MH Companion Minimal API",
         "provider": settings.provider,
-        "endpoints": ["/health", "/analyze", "/debug", "/docs"]
-    }
+        "endpoints": [
+            "/health", "/ready", "/analyze", "/chat", "/ws/analyze", "/sessions/{session_id}/mood",
+            "/analytics/emotions", "/debug", "/debug/profiles", "/docs"
+        ]
+    })
 
-@app.post("/chat", response_model=AnalyzeResponse)
-async def chat(request: AnalyzeRequest):
+@app.post("/chat", response_model=AnalyzeResponse, response_model_exclude_none=True)
+async def chat(
+    request: AnalyzeRequest,
+    fields: Optional[str] = Query(default=None),
+    x_fields: Optional[str] = Header(default=None)
+):
     """
     Chat endpoint that provides the same functionality as analyze.
     This is for compatibility with mobile app expectations.
     """
-    return await analyze_text(request)
+    return await analyze_text(request, fields, x_fields)
+
+@app.websocket("/ws/analyze")
+async def live_analyze(websocket: WebSocket):
+    """
+    Live-typing analysis over a WebSocket.
+    
+    Clients send {"type": "edit", "position", "delete", "insert"} as the user types and
+    get the updated sentiment summary back after each edit. {"type": "reset", "text"}
+    replaces the buffer, and {"type": "submit"} runs the full /analyze pipeline on it.
+    No LLM call is made before submit. Optional query parameters: session_id, fields.
+    """
+    await websocket.accept()
+    session_id = websocket.query_params.get("session_id")
+    fields = websocket.query_params.get("fields")
+    try:
+        validate_fields(fields, AnalyzeResponse.model_fields)
+    except HTTPException as e:
+        await websocket.send_json({"type": "error", "detail": e.detail})
+        await websocket.close(code=1008)
+        return
+    live = LiveAnalysis()
+    version = 0
+    
+    try:
+        while True:
+            try:
+                message = await websocket.receive_json()
+                kind = message.get("type")
+                
+                if kind == "edit":
+                    position = int(message.get("position", len(live)))
+                    delete = int(message.get("delete", 0))
+                    insert = str(message.get("insert", ""))
+                    if len(live) - delete + len(insert) > settings.live_max_chars:
+                        raise ValueError(f"Text longer than {settings.live_max_chars} characters")
+                    live.apply_edit(position, delete, insert)
+                elif kind == "reset":
+                    text = str(message.get("text", ""))
+                    if len(text) > settings.live_max_chars:
+                        raise ValueError(f"Text longer than {settings.live_max_chars} characters")
+                    live = LiveAnalysis(text)
+                elif kind == "submit":
+                    response = await _process_message(
+                        AnalyzeRequest(text=live.text, session_id=session_id),
+                        sentiment_result=live.result()
+                    )
+                    payload = select_fields(response.model_dump(), fields, _default_excluded_fields())
+                    await websocket.send_json({"type": "reply", **payload})
+                    live = LiveAnalysis()
+                    version = 0
+                    continue
+                else:
+                    raise ValueError(f"Unknown message type: {kind}")
+            except (ValueError, TypeError, AttributeError) as e:
+                await websocket.send_json({"type": "error", "detail": str(e)})
+                continue
+            except HTTPException as e:
+                await websocket.send_json({"type": "error", "detail": e.detail})
+                continue
+            
+            version += 1
+            await websocket.send_json({"type": "analysis", "version": version, "length": len(live), **live.summary()})
+    except WebSocketDisconnect:
+        pass
 
 @app.get("/debug")
-async def debug_info():
+async def debug_info(request: Request):
     """Debug endpoint to show configuration and provider status."""
     from .config import get_provider_status, validate_provider_config
     
     provider_status = get_provider_status()
     current_valid = validate_provider_config()
     
-    return {
+    return etag_response(request, {
         "current_provider": settings.provider,
+        "active_provider": get_active_provider().name,
         "provider_configured": current_valid,
         "all_providers": provider_status,
         "app_config": {
             "debug": settings.debug,
-            "log_level": settings.log_level
-        }
+            "log_level": settings.log_level,
+            "log_records_dropped": dropped_log_records()
+        },
+        "sentiment_backend": {
+            "name": settings.sentiment_backend,
+            "classifier_loaded": classifier_batcher is not None,
+            **(classifier_batcher.stats() if classifier_batcher else {})
+        },
+        "reply_cache": {
+            "enabled": settings.reply_cache_enabled,
+            **reply_cache.stats()
+        },
+        "scheduler": provider_scheduler.stats()
+    })
+
+@app.get("/analytics/emotions")
+async def analytics_emotions(days: Optional[int] = Query(default=None, ge=1)):
+    """Aggregate emotion counts for analyzed messages, optionally for the last N days."""
+    if not settings.analytics_enabled:
+        raise HTTPException(status_code=404, detail="Analytics is disabled")
+    
+    return {
+        "days": days,
+        "emotions": await analytics_store.emotion_counts(days),
+        "store": analytics_store.stats()
+    }
+
+@app.get("/sessions/{session_id}/mood")
+async def session_mood(session_id: str):
+    """Rolling mood trend for one conversation."""
+    mood = mood_tracker.get(session_id)
+    if mood is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    return {"session_id": session_id, **mood}
+
+@app.get("/debug/profiles")
+async def debug_profiles(x_profile_token: Optional[str] = Header(default=None)):
+    """
+    List captured request profiles (cProfile traces and allocation snapshots).
+    Always requires a configured PROFILING_TOKEN, also when profiling is sample-only.
+    """
+    if not token_matches(x_profile_token):
+        raise HTTPException(status_code=403, detail="Invalid profile token")
+    
+    return {
+        "enabled": profiling_enabled(),
+        "directory": settings.profiling_dir,
+        "profiles": list_profiles()
     }
 
 if __name__ == "__main__":
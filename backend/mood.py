@@ -0,0 +1,135 @@
+"""
+Incremental per-session mood trend aggregation.
+Each analyzed message updates a fixed-size rolling window and exponential moving
+averages for its session, so both updates and reads cost the same no matter how
+long the conversation has been going.
+"""
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from .config import settings
+from .sentiment import EMOTION_LEXICONS
+
+EMOTIONS = tuple(EMOTION_LEXICONS) + ("neutral",)
+
+
+class SessionMood:
+    """Rolling mood state for one conversation."""
+
+    __slots__ = (
+        "messages", "window", "window_score_sum", "window_emotions",
+        "ema_score", "ema_emotions", "started", "last_seen"
+    )
+
+    def __init__(self, window_size: int, now: float):
+        self.messages = 0
+        self.window: Deque[Tuple[int, str]] = deque(maxlen=window_size)
+        self.window_score_sum = 0
+        self.window_emotions: Dict[str, int] = dict.fromkeys(EMOTIONS, 0)
+        self.ema_score = 0.0
+        self.ema_emotions: Dict[str, float] = dict.fromkeys(EMOTIONS, 0.0)
+        self.started = now
+        self.last_seen = now
+
+    def update(self, score: int, emotion: str, alpha: float, now: float) -> None:
+        if emotion not in self.window_emotions:
+            emotion = "neutral"
+
+        if len(self.window) == self.window.maxlen:
+            old_score, old_emotion = self.window[0]
+            self.window_score_sum -= old_score
+            self.window_emotions[old_emotion] -= 1
+        self.window.append((score, emotion))
+        self.window_score_sum += score
+        self.window_emotions[emotion] += 1
+
+        # Seed the averages with the first message instead of decaying from zero
+        weight = 1.0 if self.messages == 0 else alpha
+        self.ema_score += weight * (score - self.ema_score)
+        for name in EMOTIONS:
+            target = 1.0 if name == emotion else 0.0
+            self.ema_emotions[name] += weight * (target - self.ema_emotions[name])
+
+        self.messages += 1
+        self.last_seen = now
+
+    def snapshot(self) -> Dict[str, Any]:
+        window_len = len(self.window)
+        last_score, last_emotion = self.window[-1]
+        return {
+            "messages": self.messages,
+            "window_size": window_len,
+            "window_mean_score": round(self.window_score_sum / window_len, 4),
+            "window_emotions": {
+                name: round(count / window_len, 4) for name, count in self.window_emotions.items()
+            },
+            "ema_score": round(self.ema_score, 4),
+            "ema_emotions": {name: round(value, 4) for name, value in self.ema_emotions.items()},
+            "dominant_emotion": max(self.ema_emotions.items(), key=lambda item: item[1])[0],
+            "last_score": last_score,
+            "last_emotion": last_emotion,
+            "started_at": self.started,
+            "last_seen_at": self.last_seen
+        }
+
+
+class MoodTracker:
+    """
+    Session id -> SessionMood map with idle eviction.
+
+    Sessions are kept in least-recently-updated order, so expired ones are always at
+    the front and eviction only looks at as many entries as it removes.
+    """
+
+    def __init__(self, window_size: int = 20, alpha: float = 0.3,
+                 ttl_seconds: float = 3600.0, max_sessions: int = 10000):
+        # An empty window would have no latest message to report
+        self.window_size = max(1, window_size)
+        self.alpha = alpha
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, SessionMood]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _evict(self, now: float) -> None:
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if now - oldest.last_seen <= self.ttl_seconds and len(self._sessions) <= self.max_sessions:
+                break
+            self._sessions.popitem(last=False)
+
+    def update(self, session_id: str, sentiment_result: Dict[str, Any]) -> None:
+        """
+        Fold one analyzed message into its session's mood.
+
+        Args:
+            session_id: Conversation identifier supplied by the client
+            sentiment_result: Output from analyze_sentiment()
+        """
+        now = time.time()
+        mood = self._sessions.get(session_id)
+        if mood is None:
+            mood = SessionMood(self.window_size, now)
+            self._sessions[session_id] = mood
+        else:
+            self._sessions.move_to_end(session_id)
+        mood.update(sentiment_result["score"], sentiment_result["emotion"], self.alpha, now)
+        self._evict(now)
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Return the mood snapshot for a session, or None if unknown or expired."""
+        self._evict(time.time())
+        mood = self._sessions.get(session_id)
+        return mood.snapshot() if mood is not None else None
+
+
+# Global tracker instance
+mood_tracker = MoodTracker(
+    window_size=settings.mood_window_size,
+    alpha=settings.mood_ema_alpha,
+    ttl_seconds=settings.mood_session_ttl_seconds,
+    max_sessions=settings.mood_max_sessions
+)
@@ -0,0 +1,206 @@
+"""
+On-demand request profiling.
+Captures a cProfile trace and a tracemalloc allocation snapshot for sampled or
+explicitly requested requests and writes them to a local artifact directory.
+"""
+import asyncio
+import cProfile
+import hmac
+import json
+import logging
+import os
+import random
+import time
+import tracemalloc
+import uuid
+from typing import Dict, Any, List, Optional
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_TOKEN_HEADER = "x-profile-token"
+PROFILE_ID_HEADER = "x-profile-id"
+
+# Number of allocation sites kept in each tracemalloc report
+_TOP_ALLOCATIONS = 25
+
+# cProfile cannot run two profilers at once on the same thread, and every request
+# shares the event loop thread, so only one request is profiled at a time.
+_profile_active = False
+
+# HTTP requests currently inside the app, and requests that overlapped the active profile
+_in_flight = 0
+_overlapping = 0
+
+
+def profiling_enabled() -> bool:
+    """True when profiling may be triggered by sampling or by the profile token."""
+    return settings.profiling_sample_rate > 0 or bool(settings.profiling_token)
+
+
+def token_matches(token: Optional[str]) -> bool:
+    """Constant-time check of a client-supplied profile token."""
+    if not settings.profiling_token or not token:
+        return False
+    return hmac.compare_digest(token, settings.profiling_token)
+
+
+def _write_artifacts(profile_id: str, profile: cProfile.Profile,
+                     stop_tracing: bool, metadata: Dict[str, Any]) -> None:
+    # Runs on a worker thread: snapshotting walks every traced allocation
+    try:
+        snapshot = tracemalloc.take_snapshot()
+    finally:
+        if stop_tracing:
+            tracemalloc.stop()
+
+    os.makedirs(settings.profiling_dir, exist_ok=True)
+    base = os.path.join(settings.profiling_dir, profile_id)
+
+    profile.dump_stats(f"{base}.prof")
+
+    top_stats = snapshot.statistics("lineno")[:_TOP_ALLOCATIONS]
+    with open(f"{base}.alloc.txt", "w", encoding="utf-8") as handle:
+        for stat in top_stats:
+            handle.write(f"{stat}\n")
+
+    with open(f"{base}.json", "w", encoding="utf-8") as handle:
+        json.dump(metadata, handle)
+
+    _prune_artifacts()
+
+
+def _prune_artifacts() -> None:
+    """Keep only the newest profiling_max_artifacts profiles on disk."""
+    profiles = list_profiles()
+    for stale in profiles[settings.profiling_max_artifacts:]:
+        for name in stale["files"]:
+            try:
+                os.remove(os.path.join(settings.profiling_dir, name))
+            except OSError:
+                pass
+
+
+def list_profiles() -> List[Dict[str, Any]]:
+    """
+    List captured profiles, newest first.
+
+    Returns:
+        List of profile metadata dictionaries with their artifact file names
+    """
+    if not os.path.isdir(settings.profiling_dir):
+        return []
+
+    profiles = []
+    for name in os.listdir(settings.profiling_dir):
+        if not name.endswith(".json"):
+            continue
+        profile_id = name[:-len(".json")]
+        try:
+            with open(os.path.join(settings.profiling_dir, name), encoding="utf-8") as handle:
+                metadata = json.load(handle)
+        except (OSError, ValueError):
+            continue
+        metadata["id"] = profile_id
+        metadata["files"] = [f"{profile_id}.prof", f"{profile_id}.alloc.txt", name]
+        profiles.append(metadata)
+
+    profiles.sort(key=lambda item: item.get("started_at", 0), reverse=True)
+    return profiles
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware profiling requests that are sampled or carry the profile token.
+
+    Only added to the app when profiling_enabled() is true, so a disabled
+    profiler costs nothing on the request path.
+
+    The profiler runs on the shared event loop thread, so any request the loop
+    serves meanwhile also shows up in the trace and allocation snapshot. Sampled
+    profiles are therefore only started while no other request is in flight.
+    Token requests are always profiled; their metadata records how many other
+    requests were in flight at the start (concurrent_requests) and how many
+    started during the profile (overlapping_requests).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def _should_profile(self, scope) -> Optional[str]:
+        for name, value in scope.get("headers", []):
+            if name == PROFILE_TOKEN_HEADER.encode() and token_matches(value.decode("latin-1")):
+                return "token"
+        if (settings.profiling_sample_rate > 0 and _in_flight == 0
+                and random.random() < settings.profiling_sample_rate):
+            return "sample"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        global _in_flight, _overlapping
+
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trigger = None
+        if not _profile_active and not scope["path"].startswith("/debug/profiles"):
+            trigger = self._should_profile(scope)
+        elif _profile_active:
+            _overlapping += 1
+
+        _in_flight += 1
+        try:
+            if trigger is None:
+                await self.app(scope, receive, send)
+            else:
+                await self._profile(scope, receive, send, trigger)
+        finally:
+            _in_flight -= 1
+
+    async def _profile(self, scope, receive, send, trigger: str) -> None:
+        global _profile_active, _overlapping
+
+        profile_id = f"{int(time.time() * 1000)}-{uuid.uuid4().hex[:8]}"
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((PROFILE_ID_HEADER.encode(), profile_id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        profile = cProfile.Profile()
+        started_at = time.time()
+        start = time.perf_counter()
+        concurrent = _in_flight - 1  # Excluding this request
+
+        _profile_active = True
+        _overlapping = 0
+        profile.enable()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            profile.disable()
+            duration_ms = (time.perf_counter() - start) * 1000
+
+            metadata = {
+                "method": scope.get("method"),
+                "path": scope.get("path"),
+                "trigger": trigger,
+                "started_at": started_at,
+                "duration_ms": round(duration_ms, 2),
+                "concurrent_requests": concurrent,
+                "overlapping_requests": _overlapping
+            }
+            try:
+                await asyncio.to_thread(_write_artifacts, profile_id, profile, started_tracing, metadata)
+            except OSError as e:
+                logger.error("Failed to write profile %s: %s", profile_id, e)
+            finally:
+                # Held until the snapshot is taken so no second profile starts tracing meanwhile
+                _profile_active = False
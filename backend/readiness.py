@@ -0,0 +1,130 @@
+"""
+Startup warm-up and readiness.
+Pays first-request costs (analyzer structures, classifier model, provider DNS/TLS
+and pooled connections) in the background at startup, so /ready only reports
+success once a worker can answer without a latency spike.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .config import settings
+from .classifier import batcher as classifier_batcher, classify_sentiment
+from .live import LiveAnalysis
+from .llm_adapter import get_active_provider
+from .scheduler import priority_for
+from .sentiment import analyze_sentiment
+
+logger = logging.getLogger(__name__)
+
+# Synthetic messages touching every lexicon, for the analyzer warm-up pass
+WARM_UP_MESSAGES = [
+    "I feel happy and grateful today, excited about the weekend",
+    "I'm so anxious and stressed about exams, I feel overwhelmed",
+    "Feeling sad, lonely and empty, everything seems hopeless",
+    "I'm angry and frustrated that nobody listens",
+    "Tired and exhausted but calm and hopeful"
+]
+
+WarmUpStep = Callable[[], Awaitable[Optional[str]]]
+
+
+async def _warm_analyzer() -> Optional[str]:
+    for message in WARM_UP_MESSAGES:
+        result = analyze_sentiment(message)
+        priority_for(message, result)
+        LiveAnalysis(message).result()
+    return None
+
+
+async def _warm_classifier() -> Optional[str]:
+    if classifier_batcher is None:
+        return "skipped"
+    await classify_sentiment(WARM_UP_MESSAGES[0])
+    return None
+
+
+async def _warm_provider() -> Optional[str]:
+    await asyncio.wait_for(get_active_provider().warm_up(), settings.warmup_provider_timeout_seconds)
+    return None
+
+
+# Steps run in order; each returns None for ok or a status such as "skipped"
+WARM_UP_STEPS: List[Tuple[str, WarmUpStep]] = [
+    ("analyzer", _warm_analyzer),
+    ("classifier", _warm_classifier),
+    ("provider", _warm_provider)
+]
+
+
+class Readiness:
+    """
+    Warm-up progress for the /ready endpoint.
+
+    Each step is timed and recorded as ok, skipped or error. A failed step does not
+    keep the worker out of rotation: replies already degrade to a fallback message,
+    and refusing traffic during a provider outage would take every worker down.
+    """
+
+    def __init__(self, steps: Optional[List[Tuple[str, WarmUpStep]]] = None):
+        self.steps = WARM_UP_STEPS if steps is None else steps
+        self.ready = False
+        self.results: List[Dict[str, Any]] = []
+        self._task: Optional[asyncio.Task] = None
+        self._duration_ms: Optional[float] = None
+
+    async def _run_step(self, name: str, func: WarmUpStep) -> None:
+        started = time.perf_counter()
+        entry: Dict[str, Any] = {"name": name}
+        try:
+            entry["status"] = await func() or "ok"
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            entry["status"] = "error"
+            entry["error"] = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+            logger.warning("Warm-up step %s failed: %s", name, entry["error"])
+        entry["duration_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        self.results.append(entry)
+
+    async def run(self) -> None:
+        """Run every warm-up step in order, then mark the worker ready."""
+        self.ready = False
+        self.results = []
+        started = time.perf_counter()
+        for name, func in self.steps:
+            await self._run_step(name, func)
+        self._duration_ms = round((time.perf_counter() - started) * 1000, 2)
+        self.ready = True
+        logger.info("Warm-up finished in %.1f ms", self._duration_ms)
+
+    def start(self) -> None:
+        """Run warm-up in the background; ready immediately if warm-up is disabled."""
+        if not settings.warmup_enabled:
+            self.ready = True
+            return
+        self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self) -> None:
+        """Leave rotation at shutdown and cancel a warm-up still in progress."""
+        self.ready = False
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    def status(self) -> Dict[str, Any]:
+        """Readiness flag with per-step status and timings in milliseconds."""
+        return {
+            "status": "ready" if self.ready else "warming_up",
+            "duration_ms": self._duration_ms,
+            "steps": list(self.results)
+        }
+
+
+# Global readiness state, driven by the app lifespan
+readiness = Readiness()
@@ -0,0 +1,301 @@
+"""
+Timed replay of captured traffic for performance regression testing.
+
+Usage:
+    # Replay against a running server (start it with PROVIDER=local pointed at
+    # `python -m backend.replay fake-provider captures/traffic.jsonl`)
+    python -m backend.replay run captures/traffic.jsonl --base-url http://127.0.0.1:8000
+
+    # Self-contained: drive the app in-process against a fake provider that
+    # reproduces the captured provider latencies
+    python -m backend.replay run captures/traffic.jsonl --in-process --speed 2 \\
+        --output run.json --baseline baseline.json
+
+    # Estimate how many provider calls the reply cache would avoid
+    python -m backend.replay cache captures/traffic.jsonl
+
+Requests keep their recorded inter-arrival times, divided by --speed (0 sends
+everything at once). Messages captured as hashes are replaced by synthetic text of
+the same length, derived from the hash so repeated messages stay identical.
+Without CAPTURE_TEXT=true the cache estimate therefore only sees exact repeats,
+not rephrasings, and is a lower bound.
+"""
+import argparse
+import asyncio
+import glob
+import json
+import random
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from .config import settings
+from .reply_cache import ReplyCache, is_cacheable
+from .scheduler import percentile, priority_for
+from .sentiment import analyze_sentiment
+
+# Words for synthetic messages; a mix of neutral and lexicon words so the
+# analyzer does realistic work
+_SYNTHETIC_WORDS = [
+    "i", "feel", "today", "work", "my", "friends", "family", "and", "about", "really",
+    "anxious", "stressed", "happy", "sad", "tired", "hopeful", "lonely", "calm", "worried",
+    "overwhelmed", "grateful", "exams", "sleep", "week", "again", "so", "the", "with"
+]
+
+# Relative change allowed before a metric counts as a regression
+DEFAULT_TOLERANCE = 0.10
+
+
+def load_capture(paths: List[str]) -> List[Dict[str, Any]]:
+    """
+    Load capture records from JSONL files (globs allowed), ordered by timestamp.
+
+    Args:
+        paths: Capture files, e.g. traffic.jsonl traffic.jsonl.1
+
+    Returns:
+        List of capture records
+    """
+    records = []
+    for pattern in paths:
+        for path in sorted(glob.glob(pattern)) or [pattern]:
+            with open(path, encoding="utf-8") as handle:
+                for line in handle:
+                    line = line.strip()
+                    if line:
+                        records.append(json.loads(line))
+    records.sort(key=lambda record: record["ts"])
+    return records
+
+
+def synthetic_text(record: Dict[str, Any]) -> str:
+    """Message text for a record: the captured text, or a stand-in of the same length."""
+    if record.get("text") is not None:
+        return record["text"]
+
+    length = record.get("text_length", 0)
+    if length <= 0:
+        return ""
+    rng = random.Random(record.get("text_hmac", ""))
+    words: List[str] = []
+    while sum(len(word) + 1 for word in words) < length:
+        words.append(rng.choice(_SYNTHETIC_WORDS))
+    return " ".join(words)[:length]
+
+
+def provider_latency_sampler(records: List[Dict[str, Any]], seed: int = 0):
+    """Function returning provider delays in seconds drawn from the captured latencies."""
+    latencies = [record["provider_latency_ms"] / 1000 for record in records
+                 if record.get("provider_latency_ms") is not None]
+    rng = random.Random(seed)
+    return lambda: rng.choice(latencies) if latencies else 0.0
+
+
+async def replay(records: List[Dict[str, Any]], client: httpx.AsyncClient,
+                 speed: float = 1.0) -> Dict[str, Any]:
+    """
+    Send the captured requests at their recorded offsets and collect metrics.
+
+    Args:
+        records: Capture records ordered by timestamp
+        client: HTTP client with base_url set to the server under test
+        speed: Replay rate multiplier; 0 sends every request immediately
+
+    Returns:
+        Report with throughput, latency percentiles and error rate
+    """
+    latencies: List[float] = []
+    errors = 0
+    statuses: Dict[str, int] = {}
+
+    async def send(record: Dict[str, Any], delay: float) -> None:
+        nonlocal errors
+        if delay > 0:
+            await asyncio.sleep(delay)
+        started = time.perf_counter()
+        try:
+            response = await client.post(record["route"], json={"text": synthetic_text(record)})
+            status = str(response.status_code)
+        except httpx.HTTPError:
+            status = "exception"
+        latencies.append((time.perf_counter() - started) * 1000)
+        statuses[status] = statuses.get(status, 0) + 1
+
+        # Only count failures the capture did not already have
+        if status == "exception" or (int(status) >= 500 and record.get("status", 200) < 500):
+            errors += 1
+
+    first_ts = records[0]["ts"] if records else 0.0
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        send(record, (record["ts"] - first_ts) / speed if speed > 0 else 0.0)
+        for record in records
+    ))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "requests": len(records),
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(len(records) / elapsed, 2) if elapsed > 0 else 0.0,
+        "latency_ms_p50": round(percentile(latencies, 0.50), 2),
+        "latency_ms_p90": round(percentile(latencies, 0.90), 2),
+        "latency_ms_p99": round(percentile(latencies, 0.99), 2),
+        "latency_ms_max": round(max(latencies), 2) if latencies else 0.0,
+        "error_rate": round(errors / len(records), 4) if records else 0.0,
+        "statuses": statuses
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any],
+            tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """
+    List regressions of a run against a baseline report.
+
+    Args:
+        report: Report from this run
+        baseline: Report from the baseline run
+        tolerance: Allowed relative worsening for throughput and latency
+
+    Returns:
+        Human-readable regression descriptions; empty if the run passes
+    """
+    regressions = []
+    for metric in ("latency_ms_p50", "latency_ms_p90", "latency_ms_p99"):
+        before, after = baseline.get(metric), report.get(metric)
+        if before and after is not None and after > before * (1 + tolerance):
+            regressions.append(f"{metric} rose from {before} to {after}")
+
+    before, after = baseline.get("throughput_rps"), report.get("throughput_rps")
+    if before and after is not None and after < before * (1 - tolerance):
+        regressions.append(f"throughput_rps fell from {before} to {after}")
+
+    before, after = baseline.get("error_rate", 0.0), report.get("error_rate", 0.0)
+    if after > before + 0.01:
+        regressions.append(f"error_rate rose from {before} to {after}")
+    return regressions
+
+
+def cache_report(records: List[Dict[str, Any]], cache: Optional[ReplyCache] = None) -> Dict[str, Any]:
+    """
+    Replay captured messages through a fresh reply cache and count avoided provider calls.
+
+    Args:
+        records: Capture records ordered by timestamp
+        cache: Cache to replay into (defaults to a new one built from settings)
+
+    Returns:
+        Cache statistics, plus the number of replayed, uncacheable and
+        text-captured messages
+    """
+    if cache is None:
+        cache = ReplyCache(
+            threshold=settings.reply_cache_threshold,
+            max_entries=settings.reply_cache_max_entries,
+            ttl_seconds=settings.reply_cache_ttl_seconds
+        )
+
+    replayed = uncacheable = with_text = 0
+    for record in records:
+        text = synthetic_text(record)
+        if not text.strip():
+            continue
+        replayed += 1
+        with_text += record.get("text") is not None
+
+        # Same gate as the request pipeline: crisis messages never touch the cache
+        sentiment_result = analyze_sentiment(text)
+        if not is_cacheable(priority_for(text, sentiment_result), sentiment_result):
+            uncacheable += 1
+            continue
+        if cache.lookup(text, sentiment_result["emotion"]) is None:
+            cache.store(text, sentiment_result["emotion"], f"reply-{replayed}")
+
+    stats = cache.stats()
+    stats.update({"messages": replayed, "uncacheable": uncacheable, "text_captured": with_text})
+    return stats
+
+
+async def _run(args: argparse.Namespace) -> Dict[str, Any]:
+    records = load_capture(args.capture)
+    if args.max_requests:
+        records = records[:args.max_requests]
+
+    if not args.in_process:
+        async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout) as client:
+            return await replay(records, client, args.speed)
+
+    from .fake_provider import start_fake_provider
+    from .llm_adapter import activate_provider
+
+    server, provider_url = start_fake_provider(latency=provider_latency_sampler(records))
+    settings.local_llm_base_url = provider_url
+    activate_provider("local")
+    from .main import app
+
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://replay", timeout=args.timeout) as client:
+            return await replay(records, client, args.speed)
+    finally:
+        server.shutdown()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Replay captured traffic and report performance")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Replay a capture against the API")
+    run.add_argument("capture", nargs="+", help="Capture JSONL files (globs allowed)")
+    run.add_argument("--base-url", default="http://127.0.0.1:8000")
+    run.add_argument("--in-process", action="store_true",
+                     help="Drive the app in-process against a fake local provider")
+    run.add_argument("--speed", type=float, default=1.0, help="Rate multiplier, 0 for no delays")
+    run.add_argument("--max-requests", type=int, default=0)
+    run.add_argument("--timeout", type=float, default=30.0)
+    run.add_argument("--output", help="Write the report as JSON")
+    run.add_argument("--baseline", help="Baseline report to compare against")
+    run.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+
+    cache = commands.add_parser("cache", help="Estimate provider calls avoided by the reply cache")
+    cache.add_argument("capture", nargs="+", help="Capture JSONL files (globs allowed)")
+
+    fake = commands.add_parser("fake-provider", help="Serve a fake provider with captured latencies")
+    fake.add_argument("capture", nargs="+")
+    fake.add_argument("--port", type=int, default=11434)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "cache":
+        print(json.dumps(cache_report(load_capture(args.capture)), indent=2))
+        return 0
+
+    if args.command == "fake-provider":
+        from .fake_provider import start_fake_provider
+
+        server, base_url = start_fake_provider(port=args.port, latency=provider_latency_sampler(load_capture(args.capture)))
+        print(f"Fake provider listening on {base_url}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            server.shutdown()
+        return 0
+
+    report = asyncio.run(_run(args))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            baseline = json.load(handle)
+        report["regressions"] = compare(report, baseline, args.tolerance)
+
+    print(json.dumps(report, indent=2))
+    return 1 if report.get("regressions") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+"""
+Near-duplicate reply cache placed in front of the LLM providers.
+Users rarely repeat themselves word for word, so replies are keyed by a SimHash
+fingerprint of the normalized message and looked up through a banded LSH index.
+
+The cache is shared by all users and sessions, so a reply written for one user can
+be served to another. Crisis and strongly negative messages are never looked up or
+stored (see is_cacheable), so they always get a fresh reply.
+"""
+import hashlib
+import logging
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+from .config import settings
+from .scheduler import HIGH
+
+logger = logging.getLogger(__name__)
+
+FINGERPRINT_BITS = 64
+
+# 8 bands of 8 bits: by pigeonhole, any fingerprint within 7 bits of a cached one
+# shares at least one band with it, so thresholds >= 0.89 never miss a candidate.
+_BANDS = 8
+_BAND_BITS = FINGERPRINT_BITS // _BANDS
+_BAND_MASK = (1 << _BAND_BITS) - 1
+
+# Emotion is also gated exactly on lookup, so it only needs a light weight here
+_EMOTION_WEIGHT = 1
+
+# Filler words that change phrasing but not what the user is feeling
+STOP_WORDS = {
+    "i", "im", "m", "me", "my", "myself", "a", "an", "the", "so", "really", "very",
+    "just", "about", "of", "to", "and", "or", "is", "am", "are", "was", "be", "been",
+    "it", "its", "this", "that", "at", "in", "on", "for", "with", "feel", "feeling",
+    "today", "right", "now", "quite", "too", "s", "ve", "d", "ll", "re"
+}
+
+_NON_WORD_RE = re.compile(r"[^\w\s]")
+
+
+def _normalize(text: str) -> List[str]:
+    """Lowercase, strip punctuation and drop filler words."""
+    words = _NON_WORD_RE.sub(" ", text.lower().replace("'", "")).split()
+    return [word for word in words if word not in STOP_WORDS]
+
+
+def _feature_hash(feature: str) -> int:
+    digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def simhash(text: str, emotion: str = "neutral") -> int:
+    """
+    Compute a 64-bit SimHash fingerprint for a message.
+
+    Args:
+        text: Raw user message
+        emotion: Detected primary emotion, mixed in as a weighted feature
+
+    Returns:
+        Integer fingerprint
+    """
+    words = _normalize(text)
+    features: Dict[str, int] = {}
+    for word in words:
+        features[word] = features.get(word, 0) + 1
+    for first, second in zip(words, words[1:]):
+        bigram = f"{first} {second}"
+        features[bigram] = features.get(bigram, 0) + 1
+    features[f"emotion:{emotion}"] = _EMOTION_WEIGHT
+
+    vector = [0] * FINGERPRINT_BITS
+    for feature, weight in features.items():
+        hashed = _feature_hash(feature)
+        for bit in range(FINGERPRINT_BITS):
+            if hashed >> bit & 1:
+                vector[bit] += weight
+            else:
+                vector[bit] -= weight
+
+    fingerprint = 0
+    for bit, total in enumerate(vector):
+        if total > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def similarity(first: int, second: int) -> float:
+    """Fraction of matching bits between two fingerprints."""
+    return 1.0 - bin(first ^ second).count("1") / FINGERPRINT_BITS
+
+
+def _bands(fingerprint: int) -> List[Tuple[int, int]]:
+    return [(band, fingerprint >> (band * _BAND_BITS) & _BAND_MASK) for band in range(_BANDS)]
+
+
+def is_cacheable(priority: int, sentiment_result: Dict[str, Any]) -> bool:
+    """
+    True if a message may be answered from the cache and its reply stored.
+
+    Args:
+        priority: Scheduling priority from priority_for()
+        sentiment_result: Output from analyze_sentiment()
+
+    Returns:
+        False for HIGH priority (risk terms) and strongly negative messages: a
+        near-duplicate with a crisis phrase appended must never get a stale reply
+    """
+    return priority != HIGH and sentiment_result["score"] > settings.reply_cache_min_score
+
+
+class ReplyCache:
+    """
+    LRU cache of generated replies with a banded LSH index over SimHash fingerprints.
+
+    Memory is bounded by max_entries: every entry owns exactly one slot in each band,
+    so the index never holds more than max_entries * bands references.
+    """
+
+    def __init__(self, threshold: float = 0.9, max_entries: int = 1000, ttl_seconds: float = 3600.0):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._index: Dict[Tuple[int, int], Set[int]] = {}
+        self._next_id = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, text: str, emotion: str) -> Optional[str]:
+        """
+        Return a cached reply for a near-duplicate message, if any.
+
+        Args:
+            text: Raw user message
+            emotion: Detected primary emotion; only replies for the same emotion are reused
+
+        Returns:
+            Cached reply string or None on a miss
+        """
+        fingerprint = simhash(text, emotion)
+        now = time.monotonic()
+
+        candidates: Set[int] = set()
+        for key in _bands(fingerprint):
+            candidates.update(self._index.get(key, ()))
+
+        best_id, best_score = None, self.threshold
+        for entry_id in candidates:
+            entry = self._entries[entry_id]
+            if now - entry["created"] > self.ttl_seconds:
+                self._remove(entry_id)
+                self.evictions += 1
+                continue
+            if entry["emotion"] != emotion:
+                continue
+            score = similarity(fingerprint, entry["fingerprint"])
+            if score >= best_score:
+                best_id, best_score = entry_id, score
+
+        if best_id is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._entries.move_to_end(best_id)
+        return self._entries[best_id]["reply"]
+
+    def store(self, text: str, emotion: str, reply: str) -> None:
+        """Cache a freshly generated reply, evicting the least recently used entry if full."""
+        if self.max_entries <= 0:
+            return
+        while len(self._entries) >= self.max_entries:
+            oldest_id = next(iter(self._entries))
+            self._remove(oldest_id)
+            self.evictions += 1
+
+        fingerprint = simhash(text, emotion)
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = {
+            "fingerprint": fingerprint,
+            "emotion": emotion,
+            "reply": reply,
+            "created": time.monotonic()
+        }
+        for key in _bands(fingerprint):
+            self._index.setdefault(key, set()).add(entry_id)
+
+    def _remove(self, entry_id: int) -> None:
+        entry = self._entries.pop(entry_id)
+        for key in _bands(entry["fingerprint"]):
+            bucket = self._index.get(key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._index[key]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._index.clear()
+        self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for the debug endpoint; every hit is one avoided provider call."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "index_buckets": len(self._index),
+            "provider_calls_avoided": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+# Global cache instance
+reply_cache = ReplyCache(
+    threshold=settings.reply_cache_threshold,
+    max_entries=settings.reply_cache_max_entries,
+    ttl_seconds=settings.reply_cache_ttl_seconds
+)
@@ -0,0 +1,112 @@
+"""
+Response shaping helpers: client-selected fields, compression and ETags.
+Keeps payloads small for mobile clients on slow links.
+"""
+import hashlib
+import json
+from typing import Any, Dict, Iterable, List, Optional
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, Response
+from starlette.middleware.gzip import GZipMiddleware
+
+from .config import settings
+
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:  # Brotli is optional; gzip is always available
+    BrotliMiddleware = None
+
+
+def validate_fields(fields: Optional[str], valid: Iterable[str]) -> Optional[List[str]]:
+    """
+    Parse a field selection and check it against the fields a response can have.
+
+    Called before any work is done for the request, so an invalid selection
+    costs no provider call.
+
+    Args:
+        fields: Comma-separated field names from the `fields` query parameter or
+            `X-Fields` header; None or empty means the default field set
+        valid: Field names the response model defines
+
+    Returns:
+        Requested field names, or None for the default field set
+
+    Raises:
+        HTTPException: 400 if an unknown field is requested
+    """
+    if not fields:
+        return None
+
+    valid = list(valid)
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in requested if name not in valid]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(unknown)}. Valid fields: {', '.join(valid)}"
+        )
+    return requested or None
+
+
+def select_fields(payload: Dict[str, Any], fields: Optional[str],
+                  default_exclude: Iterable[str] = ()) -> Dict[str, Any]:
+    """
+    Trim a response payload to the fields a client asked for.
+
+    Args:
+        payload: Full response dictionary
+        fields: Comma-separated field names, as accepted by validate_fields()
+        default_exclude: Fields left out when the client does not choose
+
+    Returns:
+        Trimmed payload dictionary
+
+    Raises:
+        HTTPException: 400 if an unknown field is requested
+    """
+    requested = validate_fields(fields, payload)
+    if requested is None:
+        return {key: value for key, value in payload.items() if key not in default_exclude}
+    return {name: payload[name] for name in requested}
+
+
+def etag_response(request: Request, payload: Any) -> Response:
+    """
+    Serialize a GET payload with a content-hash ETag, answering 304 on a match.
+
+    The tag is weak because the compression middleware may re-encode the body;
+    the representation is the same whether it is sent gzipped or not.
+
+    Args:
+        request: Incoming request, checked for If-None-Match
+        payload: JSON-serializable body
+
+    Returns:
+        JSONResponse with an ETag header, or an empty 304 response
+    """
+    body = json.dumps(payload, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    opaque_tag = '"' + hashlib.sha1(body).hexdigest() + '"'
+    etag = "W/" + opaque_tag
+
+    # If-None-Match uses weak comparison, so W/ prefixes are ignored on both sides
+    if_none_match = request.headers.get("if-none-match", "")
+    if opaque_tag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=304, headers={"ETag": etag})
+
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+
+def add_compression(app: FastAPI) -> None:
+    """Compress responses above compression_min_size bytes with Brotli if available, else gzip."""
+    if BrotliMiddleware is not None:
+        app.add_middleware(BrotliMiddleware, minimum_size=settings.compression_min_size, gzip_fallback=True)
+    else:
+        app.add_middleware(GZipMiddleware, minimum_size=settings.compression_min_size)
+
+
+def shaped_json(payload: Dict[str, Any], fields: Optional[str],
+                default_exclude: Iterable[str] = ()) -> JSONResponse:
+    """JSONResponse holding only the selected fields of payload."""
+    return JSONResponse(content=select_fields(payload, fields, default_exclude))
@@ -0,0 +1,240 @@
+"""
+Crisis-priority scheduling for provider capacity.
+When every provider slot is busy, waiting requests are served by priority derived
+from the sentiment analysis, so users showing signs of crisis are answered first.
+Waiting requests age upward so casual messages are delayed but never starved.
+"""
+import asyncio
+import logging
+import math
+import re
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from .config import settings
+from .sentiment import NON_WORD_RE
+
+logger = logging.getLogger(__name__)
+
+HIGH, NORMAL, LOW = 0, 1, 2
+PRIORITY_NAMES = ("high", "normal", "low")
+
+# Samples kept per priority for latency percentiles
+_METRIC_SAMPLES = 1000
+
+# Words that, directly before a risk term in the same clause, negate it
+# ("not alone", "no longer hopeless")
+NEGATIONS = frozenset({"not", "no", "never", "without"})
+_NEGATION_WINDOW = 2
+
+# Explicit self-harm phrases count even when negated ("no reason not to kill myself")
+NEVER_NEGATED = frozenset({"kill myself", "want to die", "suicidal", "suicide", "end it all", "self harm"})
+
+# A negation never reaches across these ("No. I want to die")
+_CLAUSE_RE = re.compile(r"[.,;!?\n]")
+
+
+class SchedulerFull(Exception):
+    """Raised when the queue for a request's priority level is full."""
+
+
+def _normalize(text: str) -> str:
+    return " ".join(NON_WORD_RE.sub(" ", text.lower()).split())
+
+
+@lru_cache(maxsize=4)
+def _risk_pattern(terms: Tuple[str, ...]) -> Optional[re.Pattern]:
+    """One alternation over all normalized risk terms, longest first, on word boundaries."""
+    phrases = sorted({_normalize(term) for term in terms} - {""}, key=len, reverse=True)
+    if not phrases:
+        return None
+    return re.compile(r"\b(?:" + "|".join(re.escape(phrase) for phrase in phrases) + r")\b")
+
+
+def has_risk_term(text: str) -> bool:
+    """
+    True if text contains a configured risk word or phrase that is not negated.
+
+    Matching runs on the same normalized text as analyze_sentiment(), so
+    punctuation and repeated spaces inside a phrase do not prevent a match. A
+    negation only applies within the term's own clause, and never to the
+    NEVER_NEGATED self-harm phrases: a missed crisis is worse than a false alarm.
+    """
+    pattern = _risk_pattern(tuple(settings.risk_terms))
+    if pattern is None:
+        return False
+
+    # Normalized tokens of the whole message, each tagged with its clause
+    tokens: List[str] = []
+    clauses: List[int] = []
+    for index, clause in enumerate(_CLAUSE_RE.split(text)):
+        words = _normalize(clause).split()
+        tokens.extend(words)
+        clauses.extend([index] * len(words))
+    normalized = " ".join(tokens)
+
+    for match in pattern.finditer(normalized):
+        if match.group(0) in NEVER_NEGATED:
+            return True
+        first = normalized.count(" ", 0, match.start())
+        preceding = [
+            tokens[position] for position in range(max(0, first - _NEGATION_WINDOW), first)
+            if clauses[position] == clauses[first]
+        ]
+        if NEGATIONS.isdisjoint(preceding):
+            return True
+    return False
+
+
+def priority_for(text: str, sentiment_result: Dict[str, Any]) -> int:
+    """
+    Pick a scheduling priority for a message.
+
+    Args:
+        text: Raw user message
+        sentiment_result: Output from analyze_sentiment()
+
+    Returns:
+        HIGH if the message contains a configured risk term, NORMAL for other
+        negative messages and LOW for everything else
+    """
+    if has_risk_term(text):
+        return HIGH
+    if sentiment_result["label"] == "neg":
+        return NORMAL
+    return LOW
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of a list of samples, 0.0 when empty."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = math.ceil(fraction * len(ordered))
+    return ordered[min(len(ordered), max(rank, 1)) - 1]
+
+
+class PriorityScheduler:
+    """
+    Concurrency limiter with one bounded FIFO queue per priority level.
+
+    A freed slot goes to the queue head with the best effective priority, where
+    effective priority is the level minus one for every aging_seconds waited.
+    Queues are FIFO, so only their heads need comparing.
+    """
+
+    def __init__(self, max_concurrency: int = 8, queue_size: int = 100, aging_seconds: float = 2.0):
+        self.max_concurrency = max(1, max_concurrency)
+        self.queue_size = queue_size
+        self.aging_seconds = aging_seconds
+        self._active = 0
+        self._queues: List[Deque[Tuple[float, asyncio.Future]]] = [deque() for _ in PRIORITY_NAMES]
+        self._completed = [0] * len(PRIORITY_NAMES)
+        self._rejected = [0] * len(PRIORITY_NAMES)
+        self._wait_ms: List[Deque[float]] = [deque(maxlen=_METRIC_SAMPLES) for _ in PRIORITY_NAMES]
+        self._latency_ms: List[Deque[float]] = [deque(maxlen=_METRIC_SAMPLES) for _ in PRIORITY_NAMES]
+
+    def _waiting(self) -> int:
+        return sum(len(queue) for queue in self._queues)
+
+    async def _acquire(self, priority: int) -> None:
+        if self._active < self.max_concurrency and not self._waiting():
+            self._active += 1
+            return
+
+        queue = self._queues[priority]
+        if len(queue) >= self.queue_size:
+            self._rejected[priority] += 1
+            raise SchedulerFull(f"{PRIORITY_NAMES[priority]} priority queue is full")
+
+        entry = (time.monotonic(), asyncio.get_running_loop().create_future())
+        queue.append(entry)
+        try:
+            await entry[1]
+        except asyncio.CancelledError:
+            if entry in queue:
+                queue.remove(entry)
+            elif entry[1].done() and not entry[1].cancelled():
+                # The slot was handed to us just as we were cancelled; pass it on
+                self._release()
+            raise
+
+    def _next_waiter(self) -> Optional[Tuple[float, asyncio.Future]]:
+        now = time.monotonic()
+        best_level, best_score = None, None
+        for level, queue in enumerate(self._queues):
+            if not queue:
+                continue
+            score = level - (now - queue[0][0]) / self.aging_seconds
+            if best_score is None or score < best_score:
+                best_level, best_score = level, score
+        return None if best_level is None else self._queues[best_level].popleft()
+
+    def _release(self) -> None:
+        while True:
+            entry = self._next_waiter()
+            if entry is None:
+                self._active -= 1
+                return
+            if not entry[1].done():
+                # Hand the slot straight to the waiter; the active count is unchanged
+                entry[1].set_result(None)
+                return
+
+    async def run(self, priority: int, func: Callable[..., Awaitable[Any]], *args: Any) -> Any:
+        """
+        Run func(*args) once a provider slot is free.
+
+        Args:
+            priority: HIGH, NORMAL or LOW
+            func: Coroutine function making the provider call
+            *args: Arguments for func
+
+        Returns:
+            Whatever func returns
+
+        Raises:
+            SchedulerFull: If the queue for this priority is full
+        """
+        enqueued = time.perf_counter()
+        await self._acquire(priority)
+        started = time.perf_counter()
+        try:
+            return await func(*args)
+        finally:
+            self._release()
+            finished = time.perf_counter()
+            self._completed[priority] += 1
+            self._wait_ms[priority].append((started - enqueued) * 1000)
+            self._latency_ms[priority].append((finished - enqueued) * 1000)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depths and per-priority wait/latency percentiles in milliseconds."""
+        priorities = {}
+        for level, name in enumerate(PRIORITY_NAMES):
+            waits = list(self._wait_ms[level])
+            latencies = list(self._latency_ms[level])
+            priorities[name] = {
+                "waiting": len(self._queues[level]),
+                "completed": self._completed[level],
+                "rejected": self._rejected[level],
+                "wait_ms_p50": round(percentile(waits, 0.5), 2),
+                "wait_ms_p95": round(percentile(waits, 0.95), 2),
+                "latency_ms_p50": round(percentile(latencies, 0.5), 2),
+                "latency_ms_p95": round(percentile(latencies, 0.95), 2)
+            }
+        return {
+            "active": self._active,
+            "max_concurrency": self.max_concurrency,
+            "priorities": priorities
+        }
+
+
+# Global scheduler instance
+provider_scheduler = PriorityScheduler(
+    max_concurrency=settings.provider_max_concurrency,
+    queue_size=settings.scheduler_queue_size,
+    aging_seconds=settings.scheduler_aging_seconds
+)
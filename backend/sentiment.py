@@ -8,6 +8,9 @@ from typing import Dict, List, Any, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Punctuation stripped before splitting text into words, compiled once at import
+NON_WORD_RE = re.compile(r'[^\w\s]')
+
 # Minimal positive sentiment lexicon
 POSITIVE_WORDS = {
     # Core positive emotions
@@ -116,7 +119,7 @@ def detect_emotion(text: str) -> Tuple[str, float, Dict[str, int]]:
         return "neutral", 0.0, {}
     
     # Normalize text: lowercase, remove punctuation, split into words
-    normalized_text = re.sub(r'[^\w\s]', ' ', text.lower())
+    normalized_text = NON_WORD_RE.sub(' ', text.lower())
     words = set(normalized_text.split())  # Use set to avoid duplicate counting
     
     # Calculate scores for each emotion
@@ -127,13 +130,26 @@ def detect_emotion(text: str) -> Tuple[str, float, Dict[str, int]]:
         matches = words.intersection(lexicon)
         emotion_scores[emotion] = len(matches)
     
-    # Find primary emotion
+    emotion_name, confidence = primary_emotion(emotion_scores, total_words)
+    return emotion_name, confidence, emotion_scores
+
+def primary_emotion(emotion_scores: Dict[str, int], total_words: int) -> Tuple[str, float]:
+    """
+    Pick the primary emotion and its confidence from per-emotion match counts.
+    
+    Args:
+        emotion_scores: Number of distinct lexicon words matched per emotion
+        total_words: Number of distinct words in the text
+        
+    Returns:
+        Tuple of (primary emotion, confidence score 0-1)
+    """
     if not any(emotion_scores.values()):
-        return "neutral", 0.0, emotion_scores
+        return "neutral", 0.0
     
-    primary_emotion = max(emotion_scores.items(), key=lambda x: x[1])
-    emotion_name = primary_emotion[0]
-    match_count = primary_emotion[1]
+    primary = max(emotion_scores.items(), key=lambda x: x[1])
+    emotion_name = primary[0]
+    match_count = primary[1]
     
     # Calculate confidence based on match density and uniqueness
     confidence = min(match_count / max(total_words * 0.1, 1), 1.0)
@@ -143,7 +159,7 @@ def detect_emotion(text: str) -> Tuple[str, float, Dict[str, int]]:
     if other_scores and match_count > max(other_scores) * 1.5:
         confidence = min(confidence * 1.3, 1.0)
     
-    return emotion_name, confidence, emotion_scores
+    return emotion_name, confidence
 
 def analyze_sentiment(text: str) -> Dict[str, Any]:
     """
@@ -174,7 +190,7 @@ def analyze_sentiment(text: str) -> Dict[str, Any]:
         }
     
     # Normalize text: lowercase, remove punctuation, split into words
-    normalized_text = re.sub(r'[^\w\s]', ' ', text.lower())
+    normalized_text = NON_WORD_RE.sub(' ', text.lower())
     words = normalized_text.split()
     
     # Find positive and negative word matches (for backward compatibility)
@@ -207,7 +223,7 @@ def analyze_sentiment(text: str) -> Dict[str, Any]:
         "emotion_scores": emotion_scores
     }
     
-    logger.debug(f"Sentiment and emotion analysis: {result}")
+    logger.debug("Sentiment and emotion analysis: %s", result)
     return result
 
 def get_sentiment_summary(sentiment_data: Dict[str, Any]) -> str:
@@ -0,0 +1,159 @@
+"""
+Opt-in traffic capture for load replay.
+Records anonymized metadata for /analyze and /chat requests (keyed message hash
+and length, route, status, timing and provider latency) to rotating JSONL files.
+Hashes are HMAC-SHA256 under CAPTURE_HASH_KEY: a plain hash of short messages
+could be reversed by hashing a list of likely phrases.
+Writes go through the background logging queue and never block a request.
+"""
+import contextvars
+import hashlib
+import hmac
+import json
+import logging
+import os
+import queue
+import secrets
+import time
+from logging.handlers import QueueListener, RotatingFileHandler
+from typing import Any, Dict, Optional
+
+from .config import settings
+from .logging_setup import NonBlockingQueueHandler
+
+logger = logging.getLogger(__name__)
+
+CAPTURE_ROUTES = ("/analyze", "/chat")
+CAPTURE_FILE = "traffic.jsonl"
+
+# Per-request record the handler can annotate (e.g. with provider latency)
+_current_capture: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar(
+    "current_capture", default=None
+)
+
+_capture_logger = logging.getLogger("backend.traffic.capture")
+_capture_listener: Optional[QueueListener] = None
+
+
+_process_key: Optional[bytes] = None
+
+
+def _hash_key() -> bytes:
+    """CAPTURE_HASH_KEY, or a random key that only links duplicates within this process."""
+    global _process_key
+    if settings.capture_hash_key:
+        return settings.capture_hash_key.encode("utf-8")
+    if _process_key is None:
+        logger.warning("CAPTURE_HASH_KEY not set, using a random per-process key for capture hashes")
+        _process_key = secrets.token_bytes(32)
+    return _process_key
+
+
+class CaptureFormatter(logging.Formatter):
+    """
+    Turn a capture record into one JSON line.
+
+    Runs on the listener thread, so parsing the request body and hashing the
+    message text add nothing to request latency.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        capture = dict(record.capture)
+        body = capture.pop("body", b"")
+
+        text = ""
+        try:
+            text = json.loads(body or b"{}").get("text") or ""
+        except (ValueError, AttributeError):
+            pass
+        capture["text_hmac"] = hmac.new(_hash_key(), text.encode("utf-8"), hashlib.sha256).hexdigest()
+        capture["text_length"] = len(text)
+        if settings.capture_text:
+            capture["text"] = text
+
+        return json.dumps(capture, separators=(",", ":"))
+
+
+def _start_writer() -> None:
+    global _capture_listener
+    if _capture_listener is not None:
+        return
+
+    os.makedirs(settings.capture_dir, exist_ok=True)
+    file_handler = RotatingFileHandler(
+        os.path.join(settings.capture_dir, CAPTURE_FILE),
+        maxBytes=settings.capture_max_bytes,
+        backupCount=settings.capture_backup_count,
+        encoding="utf-8"
+    )
+    file_handler.setFormatter(CaptureFormatter())
+
+    queue_handler = NonBlockingQueueHandler(queue.Queue(maxsize=settings.log_queue_size))
+    _capture_logger.addHandler(queue_handler)
+    _capture_logger.setLevel(logging.INFO)
+    _capture_logger.propagate = False
+
+    _capture_listener = QueueListener(queue_handler.queue, file_handler)
+    _capture_listener.start()
+
+
+def stop_capture() -> None:
+    """Flush pending capture records and close the capture file."""
+    global _capture_listener
+    if _capture_listener is not None:
+        _capture_listener.stop()
+        for handler in _capture_listener.handlers:
+            handler.close()
+        _capture_listener = None
+        for handler in list(_capture_logger.handlers):
+            _capture_logger.removeHandler(handler)
+
+
+def note_provider_latency(latency_ms: Optional[float]) -> None:
+    """Attach the provider latency observed by the handler to the current capture record."""
+    record = _current_capture.get()
+    if record is not None:
+        record["provider_latency_ms"] = None if latency_ms is None else round(latency_ms, 3)
+
+
+class TrafficCaptureMiddleware:
+    """
+    ASGI middleware writing one capture record per /analyze or /chat request.
+
+    Only added to the app when capture is enabled.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        _start_writer()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("method") != "POST" or scope["path"] not in CAPTURE_ROUTES:
+            await self.app(scope, receive, send)
+            return
+
+        body = bytearray()
+        status = {"code": 0}
+
+        async def capture_receive():
+            message = await receive()
+            if message["type"] == "http.request":
+                body.extend(message.get("body", b""))
+            return message
+
+        async def capture_send(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        record: Dict[str, Any] = {"ts": time.time(), "route": scope["path"], "provider_latency_ms": None}
+        token = _current_capture.set(record)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, capture_receive, capture_send)
+        finally:
+            _current_capture.reset(token)
+            record["duration_ms"] = round((time.perf_counter() - started) * 1000, 3)
+            record["status"] = status["code"] or 500
+            record["body"] = bytes(body)
+            _capture_logger.info("capture", extra={"capture": record})
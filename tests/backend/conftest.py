@@ -1,2 +1,16 @@
 import sys, os
-sys.path.append(os.path.abspath(os.path.dirname(__file__)))
\ No newline at end of file
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+
+import pytest
+
+from backend.analytics import analytics_store
+
+
+@pytest.fixture(autouse=True)
+def isolated_analytics_db(monkeypatch, tmp_path):
+    """Point the app's analytics store at a temporary database instead of ./analytics.db."""
+    monkeypatch.setattr(analytics_store, "path", str(tmp_path / "analytics.db"))
+    monkeypatch.setattr(analytics_store, "_conn", None)
+    yield
+    if analytics_store._conn is not None:
+        analytics_store._conn.close()
@@ -0,0 +1,68 @@
+"""
+Tests for the write-behind analytics store.
+"""
+import asyncio
+
+from backend.analytics import AnalyticsStore
+from backend.sentiment import analyze_sentiment
+
+
+def test_full_buffer_drops_records(tmp_path):
+    """Records beyond capacity are counted as dropped instead of blocking."""
+    store = AnalyticsStore(str(tmp_path / "analytics.db"), capacity=2)
+    result = analyze_sentiment("I am happy")
+
+    assert store.record(result, provider="mock", latency_ms=1.0)
+    assert store.record(result, provider="mock", latency_ms=1.0)
+    assert not store.record(result, provider="mock", latency_ms=1.0)
+    assert store.stats()["dropped"] == 1
+    assert store.stats()["buffered"] == 2
+
+
+def test_flush_updates_emotion_rollup(tmp_path):
+    """Flushed batches land in the messages table and the daily emotion rollup."""
+    store = AnalyticsStore(str(tmp_path / "analytics.db"), batch_size=2)
+    for text in ["I am happy", "I am so happy", "I feel sad"]:
+        store.record(analyze_sentiment(text), provider="mock", latency_ms=2.5, provider_latency_ms=1.0)
+
+    async def run():
+        written = await store.flush()
+        return written, await store.emotion_counts(), await store.emotion_counts(days=1)
+
+    written, all_time, today = asyncio.run(run())
+    assert written == 3
+    assert all_time == {"happy": 2, "sad": 1}
+    assert today == all_time
+    assert store.stats()["buffered"] == 0
+
+
+def test_background_flusher_drains_on_stop(tmp_path):
+    """Stopping the flusher writes out anything still buffered."""
+    store = AnalyticsStore(str(tmp_path / "analytics.db"), flush_interval=60)
+
+    async def run():
+        store.start()
+        store.record(analyze_sentiment("I am worried"), provider="mock", latency_ms=1.0)
+        await store.stop()
+        return await store.emotion_counts()
+
+    assert asyncio.run(run()) == {"anxious": 1}
+
+
+def test_unwritable_path_counts_failures_and_keeps_flusher_alive(tmp_path):
+    """An OSError while opening the database is logged as failed, not fatal to the flusher."""
+    blocker = tmp_path / "not-a-directory"
+    blocker.write_text("")
+    store = AnalyticsStore(str(blocker / "analytics.db"), flush_interval=0.01)
+
+    async def run():
+        store.start()
+        store.record(analyze_sentiment("I feel sad"), provider="mock", latency_ms=1.0)
+        await asyncio.sleep(0.05)
+        alive = not store._task.done()
+        await store.stop()
+        return alive
+
+    assert asyncio.run(run())
+    assert store.stats()["failed"] == 1
+    assert store.stats()["buffered"] == 0
@@ -0,0 +1,69 @@
+"""
+Tests for the micro-batched classifier sentiment backend.
+"""
+import asyncio
+import time
+
+from backend.classifier import MicroBatcher, classify_sentiment
+from backend.sentiment import analyze_sentiment
+
+
+class FakeModel:
+    """Stand-in for a scikit-learn pipeline that records batch sizes."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.batch_sizes = []
+
+    def __call__(self, texts):
+        self.batch_sizes.append(len(texts))
+        time.sleep(self.delay)
+        return [{"sad": 0.8, "happy": 0.2} if "sad" in text else {"sad": 0.1, "happy": 0.9} for text in texts]
+
+
+def test_concurrent_requests_share_one_batch():
+    """Requests arriving together are scored in a single model call."""
+    model = FakeModel()
+    batcher = MicroBatcher(model, max_batch=16, max_wait_ms=20)
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit(f"I feel sad {i}") for i in range(5)))
+
+    results = asyncio.run(run())
+    assert model.batch_sizes == [5]
+    assert all(result["sad"] == 0.8 for result in results)
+
+
+def test_batches_are_capped_at_max_batch():
+    """No batch exceeds max_batch items."""
+    model = FakeModel()
+    batcher = MicroBatcher(model, max_batch=2, max_wait_ms=20)
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit("hello") for _ in range(5)))
+
+    asyncio.run(run())
+    assert max(model.batch_sizes) <= 2
+    assert sum(model.batch_sizes) == 5
+
+
+def test_classifier_result_replaces_emotion_fields():
+    """Model output drives the emotion while score and hits stay lexicon-based."""
+    batcher = MicroBatcher(FakeModel(), max_wait_ms=1)
+    result = asyncio.run(classify_sentiment("I am sad and lonely", batcher))
+    lexicon = analyze_sentiment("I am sad and lonely")
+
+    assert result["backend"] == "classifier"
+    assert result["emotion"] == "sad"
+    assert result["emotion_confidence"] == 0.8
+    assert result["score"] == lexicon["score"]
+    assert result["neg_hits"] == lexicon["neg_hits"]
+
+
+def test_slow_model_falls_back_to_lexicon():
+    """A model that misses the deadline yields the lexicon result."""
+    batcher = MicroBatcher(FakeModel(delay=0.5), max_wait_ms=1)
+    result = asyncio.run(classify_sentiment("I am happy", batcher))
+
+    assert result["backend"] == "lexicon"
+    assert result == {**analyze_sentiment("I am happy"), "backend": "lexicon"}
@@ -0,0 +1,75 @@
+"""
+Tests for incremental live-typing analysis.
+Every incremental state is checked against a full analyze_sentiment() recompute.
+"""
+import random
+
+import pytest
+
+from backend.live import LiveAnalysis
+from backend.sentiment import analyze_sentiment
+
+VOCABULARY = [
+    "I", "am", "happy", "sad", "so", "hopeless", "and", "anxious", "worried", "joyful",
+    "stressed", "calm", "empty", "fed", "up", "today", "Love", "HAPPY", "don't", "café"
+]
+SEPARATORS = [" ", "  ", ", ", ". ", "!", "\n", "-", "'", "?? "]
+
+
+def _assert_matches(live: LiveAnalysis, text: str) -> None:
+    assert live.text == text
+    assert live.result() == analyze_sentiment(text)
+
+
+def test_typing_character_by_character():
+    """Appending one keystroke at a time tracks the full analysis."""
+    message = "I was happy, then sad... now I'm anxious & worried. Hopeless? No - calm!"
+    live = LiveAnalysis()
+    for index, char in enumerate(message):
+        live.apply_edit(index, 0, char)
+        _assert_matches(live, message[:index + 1])
+
+
+def test_backspacing_to_empty():
+    """Deleting from the end back to nothing returns to the empty result."""
+    message = "so sad and empty"
+    live = LiveAnalysis(message)
+    for length in range(len(message) - 1, -1, -1):
+        live.apply_edit(length, 1)
+        _assert_matches(live, message[:length])
+
+
+def test_random_edits_match_full_recompute():
+    """Random inserts, deletes and replacements anywhere in the text stay exact."""
+    rng = random.Random(1234)
+    text = ""
+    live = LiveAnalysis()
+    for _ in range(2000):
+        position = rng.randint(0, len(text))
+        delete = rng.randint(0, min(6, len(text) - position))
+        insert = "".join(
+            rng.choice(VOCABULARY) + rng.choice(SEPARATORS) for _ in range(rng.randint(0, 2))
+        )
+        if rng.random() < 0.3:
+            insert = insert[:rng.randint(0, len(insert))]
+
+        live.apply_edit(position, delete, insert)
+        text = text[:position] + insert + text[position + delete:]
+        _assert_matches(live, text)
+
+
+def test_summary_agrees_with_result():
+    """The cheap summary carries the same score and emotion as the full result."""
+    live = LiveAnalysis("I feel hopeless and sad but a bit hopeful")
+    summary, result = live.summary(), live.result()
+    assert summary["score"] == result["score"]
+    assert summary["pos_count"] == len(result["pos_hits"])
+    assert summary["neg_count"] == len(result["neg_hits"])
+    assert summary["emotion"] == result["emotion"]
+
+
+def test_out_of_range_edit_rejected():
+    """Edits past the end of the text raise ValueError."""
+    live = LiveAnalysis("hello")
+    with pytest.raises(ValueError):
+        live.apply_edit(3, 5)
@@ -0,0 +1,62 @@
+"""
+Tests for the non-blocking JSON logging pipeline.
+"""
+import json
+import logging
+import queue
+import sys
+
+from backend.logging_setup import JsonFormatter, NonBlockingQueueHandler, SamplingFilter
+
+
+def _record(name="backend.test", level=logging.INFO, msg="hello %s", args=("world",), **extra):
+    record = logging.LogRecord(name, level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter_includes_extra_fields_and_exceptions():
+    """Each record becomes one JSON line with its message, extras and traceback."""
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = _record(level=logging.ERROR, request_id="abc")
+        record.exc_info = sys.exc_info()
+
+    line = JsonFormatter().format(record)
+    assert "\n" not in line
+    payload = json.loads(line)
+    assert payload["message"] == "hello world"
+    assert payload["level"] == "ERROR"
+    assert payload["request_id"] == "abc"
+    assert "ValueError: boom" in payload["exc_info"]
+
+
+def test_sampling_filter_applies_to_logger_and_children():
+    """Configured loggers are sampled at DEBUG/INFO; warnings and other loggers pass."""
+    sampling = SamplingFilter({"backend": 0.0, "backend.keep": 1.0})
+    assert not sampling.filter(_record("backend.sentiment"))
+    assert sampling.filter(_record("backend.keep.child"))
+    assert sampling.filter(_record("backend.sentiment", level=logging.WARNING))
+    assert sampling.filter(_record("httpx"))
+
+
+def test_queue_handler_drops_when_full():
+    """A full queue drops records and counts them instead of blocking the caller."""
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    for _ in range(3):
+        handler.handle(_record())
+    assert handler.queue.qsize() == 1
+    assert handler.dropped == 2
+
+
+def test_message_is_rendered_before_args_change():
+    """Arguments mutated after the log call do not leak into the queued message."""
+    handler = NonBlockingQueueHandler(queue.Queue())
+    result = {"label": "neg"}
+    handler.handle(_record(msg="result: %s", args=(result,)))
+    result["backend"] = "lexicon"
+
+    queued = handler.queue.get_nowait()
+    assert queued.args is None
+    assert json.loads(JsonFormatter().format(queued))["message"] == "result: {'label': 'neg'}"
@@ -0,0 +1,61 @@
+"""
+Tests for per-session mood trend aggregation.
+"""
+import pytest
+from pydantic import ValidationError
+
+from backend.config import Settings
+from backend.mood import MoodTracker
+from backend.sentiment import analyze_sentiment
+
+
+def test_rolling_window_matches_recent_messages():
+    """Window statistics only reflect the last window_size messages."""
+    tracker = MoodTracker(window_size=3)
+    texts = ["I am sad", "I am sad", "I am happy", "I am happy", "I am happy and joyful"]
+    for text in texts:
+        tracker.update("s1", analyze_sentiment(text))
+
+    mood = tracker.get("s1")
+    recent = [analyze_sentiment(text)["score"] for text in texts[-3:]]
+    assert mood["messages"] == 5
+    assert mood["window_size"] == 3
+    assert mood["window_mean_score"] == round(sum(recent) / 3, 4)
+    assert mood["window_emotions"]["sad"] == 0.0
+    assert mood["window_emotions"]["happy"] == 1.0
+
+
+def test_moving_average_tracks_recent_mood():
+    """The EMA starts at the first message and moves toward newer ones."""
+    tracker = MoodTracker(alpha=0.5)
+    tracker.update("s1", analyze_sentiment("I am sad"))
+    assert tracker.get("s1")["ema_score"] == -1.0
+
+    tracker.update("s1", analyze_sentiment("I am happy"))
+    mood = tracker.get("s1")
+    assert mood["ema_score"] == 0.0
+    assert mood["ema_emotions"]["happy"] == 0.5
+
+
+def test_idle_sessions_are_evicted():
+    """Sessions idle past the TTL, or beyond max_sessions, are dropped."""
+    tracker = MoodTracker(ttl_seconds=0.0)
+    tracker.update("s1", analyze_sentiment("I am sad"))
+    assert tracker.get("s1") is None
+
+    tracker = MoodTracker(max_sessions=2)
+    for session_id in ["a", "b", "c"]:
+        tracker.update(session_id, analyze_sentiment("I am sad"))
+    assert len(tracker) == 2
+    assert tracker.get("a") is None
+    assert tracker.get("c") is not None
+
+
+def test_window_size_below_one_is_rejected_or_clamped():
+    """MOOD_WINDOW_SIZE=0 fails at startup, and a tracker built directly keeps one message."""
+    with pytest.raises(ValidationError):
+        Settings(mood_window_size=0)
+
+    tracker = MoodTracker(window_size=0)
+    tracker.update("s1", analyze_sentiment("I am sad"))
+    assert tracker.get("s1")["window_size"] == 1
@@ -0,0 +1,77 @@
+"""
+Tests for on-demand request profiling and the /debug/profiles listing.
+"""
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.config import settings
+from backend.main import app
+from backend.profiling import PROFILE_ID_HEADER, PROFILE_TOKEN_HEADER, ProfilingMiddleware
+
+TOKEN = "test-profile-token"
+
+
+@pytest.fixture
+def profiling(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "profiling_token", TOKEN)
+    monkeypatch.setattr(settings, "profiling_sample_rate", 0.0)
+    monkeypatch.setattr(settings, "profiling_dir", str(tmp_path))
+    return tmp_path
+
+
+def _profiled_app() -> FastAPI:
+    profiled = FastAPI()
+    profiled.add_middleware(ProfilingMiddleware)
+
+    @profiled.get("/work")
+    async def work():
+        return {"total": sum(range(1000))}
+
+    return profiled
+
+
+def test_token_request_writes_artifacts_and_is_listed(profiling):
+    """A request with the profile token leaves .prof/.alloc.txt/.json and appears in the listing."""
+    response = TestClient(_profiled_app()).get("/work", headers={PROFILE_TOKEN_HEADER: TOKEN})
+    assert response.status_code == 200
+    profile_id = response.headers[PROFILE_ID_HEADER]
+
+    for suffix in (".prof", ".alloc.txt", ".json"):
+        assert (profiling / f"{profile_id}{suffix}").exists()
+    metadata = json.loads((profiling / f"{profile_id}.json").read_text())
+    assert metadata["path"] == "/work"
+    assert metadata["trigger"] == "token"
+    assert metadata["concurrent_requests"] == 0
+
+    listing = TestClient(app).get("/debug/profiles", headers={PROFILE_TOKEN_HEADER: TOKEN})
+    assert listing.status_code == 200
+    assert [profile["id"] for profile in listing.json()["profiles"]] == [profile_id]
+
+
+def test_requests_without_valid_token_are_not_profiled(profiling):
+    """Missing or wrong tokens leave no artifacts when sampling is off."""
+    client = TestClient(_profiled_app())
+    assert PROFILE_ID_HEADER not in client.get("/work").headers
+    assert PROFILE_ID_HEADER not in client.get("/work", headers={PROFILE_TOKEN_HEADER: "wrong"}).headers
+    assert list(profiling.iterdir()) == []
+
+
+def test_bad_token_cannot_list_profiles(profiling):
+    """/debug/profiles answers 403 to a wrong or missing token."""
+    client = TestClient(app)
+    assert client.get("/debug/profiles", headers={PROFILE_TOKEN_HEADER: "wrong"}).status_code == 403
+    assert client.get("/debug/profiles").status_code == 403
+
+
+def test_profiles_hidden_without_configured_token(monkeypatch, tmp_path):
+    """Sample-only profiling never exposes the listing, whatever header is sent."""
+    monkeypatch.setattr(settings, "profiling_token", None)
+    monkeypatch.setattr(settings, "profiling_sample_rate", 0.5)
+    monkeypatch.setattr(settings, "profiling_dir", str(tmp_path))
+    client = TestClient(app)
+    assert client.get("/debug/profiles").status_code == 403
+    assert client.get("/debug/profiles", headers={PROFILE_TOKEN_HEADER: ""}).status_code == 403
+    assert client.get("/debug/profiles", headers={PROFILE_TOKEN_HEADER: "anything"}).status_code == 403
@@ -0,0 +1,115 @@
+"""
+Tests for the provider registry and the local OpenAI-compatible backend.
+All traffic goes to a fake server on 127.0.0.1.
+"""
+import asyncio
+
+import pytest
+
+from backend.config import settings, get_provider_status
+from backend.fake_provider import start_fake_provider
+from backend.llm_adapter import (
+    PROVIDERS, LLMProvider, LocalLLMProvider, register_provider, resolve_provider,
+    activate_provider, generate_reply
+)
+
+
+@pytest.fixture
+def fake_server():
+    server, base_url = start_fake_provider(reply="You are not alone in this.")
+    original_url = settings.local_llm_base_url
+    settings.local_llm_base_url = base_url
+    yield server
+    settings.local_llm_base_url = original_url
+    server.shutdown()
+
+
+def test_registry_resolves_known_and_unknown_providers():
+    """Known names resolve to their provider, unknown names fall back to mock."""
+    assert resolve_provider("Gemini") is PROVIDERS["gemini"]
+    assert resolve_provider("does-not-exist") is PROVIDERS["mock"]
+
+
+def test_registered_provider_receives_dispatch():
+    """A newly registered provider is used once activated, without editing the adapter."""
+
+    class EchoProvider(LLMProvider):
+        name = "echo"
+
+        def generate(self, text):
+            return f"echo: {text}"
+
+    register_provider(EchoProvider())
+    try:
+        activate_provider("echo")
+        assert generate_reply("x" * 600) == "echo: " + "x" * 500
+        assert "echo" in get_provider_status()
+    finally:
+        PROVIDERS.pop("echo")
+        activate_provider()
+
+
+def test_local_provider_sync_and_async(fake_server):
+    """The local backend talks to an OpenAI-compatible server over both APIs."""
+    provider = LocalLLMProvider()
+    assert provider.generate("I feel lonely") == "You are not alone in this."
+    assert asyncio.run(provider.agenerate("I feel lonely")) == "You are not alone in this."
+    assert fake_server.requests == 2
+    provider.close()
+
+
+def test_local_provider_streams_chunks(fake_server):
+    """Streaming yields the reply incrementally."""
+    provider = LocalLLMProvider()
+
+    async def collect():
+        return [chunk async for chunk in provider.stream("I feel lonely")]
+
+    chunks = asyncio.run(collect())
+    assert len(chunks) > 1
+    assert "".join(chunks).strip() == "You are not alone in this."
+
+
+def test_local_provider_falls_back_when_server_fails():
+    """Server errors produce the provider's fallback reply instead of raising."""
+    server, base_url = start_fake_provider(status=500)
+    original_url = settings.local_llm_base_url
+    settings.local_llm_base_url = base_url
+    try:
+        reply = LocalLLMProvider().generate("hello")
+        assert "couldn't reach the local model" in reply
+    finally:
+        settings.local_llm_base_url = original_url
+        server.shutdown()
+
+
+def test_aclose_closes_pooled_async_client(fake_server):
+    """aclose() closes the async client on its own loop instead of dropping it."""
+    provider = LocalLLMProvider()
+
+    async def use_and_close():
+        await provider.agenerate("hello")
+        client = provider._async_client
+        await provider.aclose()
+        return client
+
+    client = asyncio.run(use_and_close())
+    assert client.is_closed
+    assert provider._async_client is None
+
+
+def test_lifespan_shutdown_closes_active_provider(fake_server):
+    """Leaving the app lifespan closes the connection pool warm-up opened."""
+    from fastapi.testclient import TestClient
+    from backend.main import app
+
+    provider = activate_provider("local")
+    try:
+        with TestClient(app) as client:
+            client.post("/analyze", json={"text": "I feel lonely"})
+            pooled = provider._async_client
+            assert pooled is not None
+        assert pooled.is_closed
+        assert provider._async_client is None
+    finally:
+        activate_provider()
@@ -0,0 +1,74 @@
+"""
+Tests for startup warm-up and the /ready endpoint.
+Provider connections are checked against a fake server on 127.0.0.1.
+"""
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.config import settings
+from backend.fake_provider import start_fake_provider
+from backend.llm_adapter import LocalLLMProvider
+from backend.main import app
+from backend.readiness import Readiness
+
+
+def test_ready_after_warm_up_with_step_timings():
+    """/ready answers 503 before startup and 200 with every step once warm-up is done."""
+    client = TestClient(app)
+    assert client.get("/ready").status_code == 503
+    assert client.get("/health").json() == {"status": "ok"}
+
+    with TestClient(app) as client:
+        deadline = time.monotonic() + 5
+        response = client.get("/ready")
+        while response.status_code != 200 and time.monotonic() < deadline:
+            time.sleep(0.01)
+            response = client.get("/ready")
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["status"] == "ready"
+        steps = {step["name"]: step for step in body["steps"]}
+        assert set(steps) == {"analyzer", "classifier", "provider"}
+        assert steps["analyzer"]["status"] == "ok"
+        assert all(step["duration_ms"] >= 0 for step in steps.values())
+
+
+def test_failed_step_is_reported_without_blocking_readiness():
+    """Errors are recorded per step and later steps still run."""
+
+    async def broken():
+        raise ConnectionError("dns lookup failed")
+
+    async def skipped():
+        return "skipped"
+
+    readiness = Readiness(steps=[("provider", broken), ("classifier", skipped)])
+    asyncio.run(readiness.run())
+
+    assert readiness.ready
+    provider, classifier = readiness.status()["steps"]
+    assert provider["status"] == "error"
+    assert "dns lookup failed" in provider["error"]
+    assert classifier["status"] == "skipped"
+
+
+def test_provider_warm_up_checks_connection():
+    """The local provider warm-up succeeds against a live server and fails without one."""
+    server, base_url = start_fake_provider()
+    original_url = settings.local_llm_base_url
+    provider = LocalLLMProvider()
+    try:
+        settings.local_llm_base_url = base_url
+        asyncio.run(provider.warm_up())
+
+        server.shutdown()
+        server.server_close()
+        with pytest.raises(Exception):
+            asyncio.run(provider.warm_up())
+    finally:
+        settings.local_llm_base_url = original_url
+        provider.close()
@@ -0,0 +1,142 @@
+"""
+Tests for traffic capture and replay.
+Provider calls go to a fake server on 127.0.0.1.
+"""
+import asyncio
+import hashlib
+import hmac
+import json
+
+import httpx
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.config import settings
+from backend.fake_provider import start_fake_provider
+from backend.llm_adapter import activate_provider
+from backend.main import app
+from backend.replay import cache_report, compare, load_capture, replay, synthetic_text
+from backend.traffic import CAPTURE_FILE, TrafficCaptureMiddleware, note_provider_latency, stop_capture
+
+
+def test_synthetic_text_is_deterministic_and_sized():
+    """Hashed messages become stable stand-ins of the captured length."""
+    record = {"text_hmac": "abc123", "text_length": 42}
+    text = synthetic_text(record)
+    assert len(text) == 42
+    assert synthetic_text(dict(record)) == text
+    assert synthetic_text({"text_hmac": "other", "text_length": 42}) != text
+
+
+def test_synthetic_text_prefers_captured_text():
+    """Captured text is replayed verbatim."""
+    assert synthetic_text({"text": "I feel sad", "text_hmac": "x", "text_length": 10}) == "I feel sad"
+
+
+def test_load_capture_orders_by_timestamp(tmp_path):
+    """Records from rotated files are merged in arrival order."""
+    (tmp_path / "traffic.jsonl").write_text(json.dumps({"ts": 3.0, "route": "/chat"}) + "\n")
+    (tmp_path / "traffic.jsonl.1").write_text(
+        json.dumps({"ts": 2.0, "route": "/analyze"}) + "\n\n" + json.dumps({"ts": 1.0, "route": "/chat"}) + "\n"
+    )
+    records = load_capture([str(tmp_path / "traffic.jsonl*")])
+    assert [record["ts"] for record in records] == [1.0, 2.0, 3.0]
+
+
+def test_compare_flags_regressions():
+    """Latency, throughput and error rate changes beyond tolerance are reported."""
+    baseline = {"latency_ms_p50": 10, "latency_ms_p90": 20, "latency_ms_p99": 40,
+                "throughput_rps": 100, "error_rate": 0.0}
+    assert compare(dict(baseline, latency_ms_p99=43), baseline, tolerance=0.1) == []
+
+    regressions = compare(dict(baseline, latency_ms_p99=50, throughput_rps=80, error_rate=0.05), baseline)
+    assert len(regressions) == 3
+    assert any("latency_ms_p99" in regression for regression in regressions)
+
+
+def test_cache_report_counts_avoided_calls():
+    """Rephrasings with captured text and exact repeats of hashed messages hit the cache."""
+    records = [
+        {"ts": 1.0, "text": "I'm so stressed about exams"},
+        {"ts": 2.0, "text": "really stressed about my exams"},
+        {"ts": 3.0, "text_hmac": "abc", "text_length": 40},
+        {"ts": 4.0, "text_hmac": "abc", "text_length": 40},
+        {"ts": 5.0, "text": "I want to kill myself"},
+        {"ts": 6.0, "text": ""}
+    ]
+    stats = cache_report(records)
+    assert stats["messages"] == 5
+    assert stats["text_captured"] == 3
+    assert stats["uncacheable"] == 1
+    assert stats["provider_calls_avoided"] == 2
+
+
+def _capture_app() -> FastAPI:
+    captured = FastAPI()
+    captured.add_middleware(TrafficCaptureMiddleware)
+
+    @captured.post("/analyze")
+    async def analyze(body: dict):
+        note_provider_latency(12.3456)
+        return {"length": len(body["text"])}
+
+    @captured.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    return captured
+
+
+def test_capture_middleware_writes_keyed_hash_without_text(monkeypatch, tmp_path):
+    """Captured /analyze requests carry an HMAC, length and provider latency but no text."""
+    monkeypatch.setattr(settings, "capture_dir", str(tmp_path))
+    monkeypatch.setattr(settings, "capture_hash_key", "test-key")
+    monkeypatch.setattr(settings, "capture_text", False)
+
+    client = TestClient(_capture_app())
+    try:
+        assert client.post("/analyze", json={"text": "I feel alone"}).status_code == 200
+        client.get("/health")
+    finally:
+        stop_capture()
+
+    lines = (tmp_path / CAPTURE_FILE).read_text().splitlines()
+    assert len(lines) == 1
+    record = json.loads(lines[0])
+    assert record["route"] == "/analyze"
+    assert record["status"] == 200
+    assert record["provider_latency_ms"] == 12.346
+    assert record["text_length"] == len("I feel alone")
+    assert record["text_hmac"] == hmac.new(b"test-key", b"I feel alone", hashlib.sha256).hexdigest()
+    assert record["text_hmac"] != hashlib.sha256(b"I feel alone").hexdigest()
+    assert "text" not in record and "body" not in record
+
+
+def test_replay_in_process_against_fake_provider(monkeypatch):
+    """Replaying through the app and the local provider reports every request as successful."""
+    server, base_url = start_fake_provider()
+    monkeypatch.setattr(settings, "local_llm_base_url", base_url)
+    records = [
+        {"ts": 100.0, "route": "/analyze", "status": 200, "text_hmac": "a", "text_length": 30},
+        {"ts": 100.01, "route": "/chat", "status": 200, "text": "I feel sad today"},
+        {"ts": 100.02, "route": "/analyze", "status": 200, "text_hmac": "a", "text_length": 30}
+    ]
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://replay") as client:
+            return await replay(records, client, speed=1.0)
+
+    activate_provider("local")
+    try:
+        report = asyncio.run(run())
+    finally:
+        activate_provider()
+        server.shutdown()
+
+    assert report["requests"] == 3
+    assert server.requests == 3
+    assert report["statuses"] == {"200": 3}
+    assert report["error_rate"] == 0.0
+    assert report["latency_ms_p99"] >= report["latency_ms_p50"] > 0
+    assert compare(report, report) == []
@@ -0,0 +1,84 @@
+"""
+Tests for the near-duplicate reply cache.
+"""
+from fastapi.testclient import TestClient
+
+import backend.main as main_module
+from backend.config import settings
+from backend.reply_cache import ReplyCache, is_cacheable, simhash, similarity
+from backend.scheduler import HIGH, LOW
+from backend.sentiment import analyze_sentiment
+
+
+def test_rephrased_message_hits_cache():
+    """Slightly different phrasing of the same feeling reuses the cached reply."""
+    cache = ReplyCache(threshold=0.9)
+    cache.store("I'm so stressed about exams", "anxious", "Exams can feel like a lot.")
+
+    reply = cache.lookup("really stressed about my exams", "anxious")
+    assert reply == "Exams can feel like a lot."
+    assert cache.stats()["provider_calls_avoided"] == 1
+
+
+def test_different_message_misses_cache():
+    """Unrelated messages and other emotions never reuse a reply."""
+    cache = ReplyCache(threshold=0.9)
+    cache.store("I'm so stressed about exams", "anxious", "Exams can feel like a lot.")
+
+    assert cache.lookup("my dog ran away and I miss him", "sad") is None
+    assert cache.lookup("I'm so stressed about exams", "sad") is None
+    assert cache.stats()["misses"] == 2
+
+
+def test_similarity_of_identical_fingerprints():
+    """Identical input produces identical fingerprints."""
+    fingerprint = simhash("feeling lonely tonight", "sad")
+    assert similarity(fingerprint, simhash("feeling lonely tonight", "sad")) == 1.0
+
+
+def test_lru_eviction_caps_entries():
+    """The cache never grows past max_entries and cleans up its index."""
+    cache = ReplyCache(max_entries=2)
+    cache.store("first message about work", "neutral", "one")
+    cache.store("second message about family", "neutral", "two")
+    cache.store("third message about school", "neutral", "three")
+
+    assert len(cache) == 2
+    assert cache.stats()["evictions"] == 1
+    assert cache.lookup("first message about work", "neutral") is None
+    assert cache.stats()["index_buckets"] <= 2 * 8
+
+
+def test_expired_entries_are_not_returned():
+    """Entries older than the TTL are evicted on lookup."""
+    cache = ReplyCache(ttl_seconds=0.0)
+    cache.store("I'm so stressed about exams", "anxious", "reply")
+    assert cache.lookup("I'm so stressed about exams", "anxious") is None
+    assert len(cache) == 0
+
+
+def test_crisis_messages_bypass_cache(monkeypatch):
+    """A near-duplicate with a crisis phrase appended is neither served from nor stored in the cache."""
+    cache = ReplyCache(threshold=0.9)
+    monkeypatch.setattr(main_module, "reply_cache", cache)
+    monkeypatch.setattr(settings, "reply_cache_enabled", True)
+    client = TestClient(main_module.app)
+
+    base = ("I have three exams next week and so many chapters left to read before "
+            "the deadlines, and I keep thinking about everything I still have to do")
+    client.post("/analyze", json={"text": base})
+    assert len(cache) == 1
+
+    for suffix in [" and I want to kill myself", " I want to die"]:
+        client.post("/analyze", json={"text": base + suffix})
+    assert len(cache) == 1
+    assert cache.stats()["provider_calls_avoided"] == 0
+    assert cache.stats()["misses"] == 1
+
+
+def test_is_cacheable_rejects_urgent_and_strongly_negative():
+    """Only non-urgent messages that are not strongly negative may use the cache."""
+    calm = analyze_sentiment("I'm so stressed about exams")
+    assert is_cacheable(LOW, calm)
+    assert not is_cacheable(HIGH, calm)
+    assert not is_cacheable(LOW, analyze_sentiment("sad, hopeless, empty and exhausted"))
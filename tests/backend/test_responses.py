@@ -0,0 +1,96 @@
+"""
+Tests for response shaping: field selection, ETags and compression.
+"""
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from backend.analytics import analytics_store
+from backend.config import settings
+from backend.main import app
+from backend.responses import select_fields, validate_fields
+from backend.scheduler import provider_scheduler
+
+client = TestClient(app)
+
+
+def _completed_calls() -> int:
+    return sum(level["completed"] for level in provider_scheduler.stats()["priorities"].values())
+
+
+def test_fields_query_and_header_select_response_keys():
+    """Only the requested fields are returned, from either the query or the header."""
+    response = client.post("/analyze?fields=sentiment,reply", json={"text": "I feel happy"})
+    assert response.status_code == 200
+    assert set(response.json()) == {"sentiment", "reply"}
+
+    response = client.post("/chat", json={"text": "I feel happy"}, headers={"X-Fields": "emotion"})
+    assert set(response.json()) == {"emotion"}
+
+
+def test_production_drops_debug_unless_requested(monkeypatch):
+    """debug is left out by default in production but can still be selected."""
+    monkeypatch.setattr(settings, "environment", "production")
+    assert "debug" not in client.post("/analyze", json={"text": "I feel sad"}).json()
+    assert "debug" in client.post("/analyze?fields=debug", json={"text": "I feel sad"}).json()
+
+    monkeypatch.setattr(settings, "environment", "development")
+    assert "debug" in client.post("/analyze", json={"text": "I feel sad"}).json()
+
+
+def test_unknown_field_rejected_before_any_work():
+    """An invalid selection is a 400 and neither calls the provider nor records analytics."""
+    completed, recorded = _completed_calls(), analytics_store.recorded
+    response = client.post("/analyze?fields=bogus", json={"text": "I feel hopeless"})
+    assert response.status_code == 400
+    assert "bogus" in response.json()["detail"]
+    assert _completed_calls() == completed
+    assert analytics_store.recorded == recorded
+
+
+def test_unknown_field_rejected_on_websocket():
+    """The live-typing socket reports a bad selection and closes before accepting edits."""
+    completed = _completed_calls()
+    with client.websocket_connect("/ws/analyze?fields=bogus") as websocket:
+        message = websocket.receive_json()
+    assert message["type"] == "error"
+    assert "bogus" in message["detail"]
+    assert _completed_calls() == completed
+
+
+def test_select_and_validate_helpers():
+    """Helpers return the default set, a selection, or raise on unknown names."""
+    payload = {"a": 1, "b": 2, "debug": {}}
+    assert select_fields(payload, None, ("debug",)) == {"a": 1, "b": 2}
+    assert select_fields(payload, " b , a ") == {"b": 2, "a": 1}
+    assert validate_fields("", payload) is None
+    with pytest.raises(HTTPException) as error:
+        validate_fields("a,nope", payload)
+    assert error.value.status_code == 400
+
+
+def test_etag_answers_304_on_match():
+    """A matching If-None-Match, weak or strong, returns 304 without a body."""
+    first = client.get("/")
+    etag = first.headers["etag"]
+    assert etag.startswith('W/"')
+
+    cached = client.get("/", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert client.get("/", headers={"If-None-Match": etag.removeprefix("W/")}).status_code == 304
+    assert client.get("/", headers={"If-None-Match": 'W/"stale"'}).status_code == 200
+
+
+def test_compression_threshold_and_etag_per_encoding():
+    """Large bodies are compressed, small ones are not, and the ETag stays weak for both."""
+    gzipped = client.get("/debug", headers={"Accept-Encoding": "gzip"})
+    identity = client.get("/debug", headers={"Accept-Encoding": "identity"})
+    assert gzipped.headers.get("content-encoding") == "gzip"
+    assert "content-encoding" not in identity.headers
+    assert gzipped.json() == identity.json()
+    assert gzipped.headers["etag"].startswith("W/")
+
+    small = client.get("/health", headers={"Accept-Encoding": "gzip"})
+    assert len(small.content) < settings.compression_min_size
+    assert "content-encoding" not in small.headers
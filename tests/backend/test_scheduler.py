@@ -0,0 +1,110 @@
+"""
+Tests for crisis-priority scheduling of provider calls.
+"""
+import asyncio
+
+import pytest
+
+from backend.config import settings
+from backend.scheduler import HIGH, LOW, NORMAL, PriorityScheduler, SchedulerFull, priority_for
+from backend.sentiment import analyze_sentiment
+
+
+def test_priority_from_sentiment_and_risk_terms():
+    """Risk terms outrank ordinary negative messages, which outrank the rest."""
+    for text, expected in [
+        ("I feel hopeless and empty", HIGH),
+        ("I am annoyed at traffic", NORMAL),
+        ("What a nice day", LOW)
+    ]:
+        assert priority_for(text, analyze_sentiment(text)) == expected
+
+
+def test_multi_word_risk_terms_match():
+    """Configured phrases match across punctuation and spacing."""
+    for text in ["I want to kill myself", "I want to end it all tonight", "I feel so... empty"]:
+        assert priority_for(text, analyze_sentiment(text)) == HIGH
+
+
+def test_negated_and_unrelated_words_are_not_urgent():
+    """Negated terms and bare words outside a risk phrase do not raise priority."""
+    text = "I am not alone, my fridge is empty"
+    assert priority_for(text, analyze_sentiment(text)) != HIGH
+    text = "I'm never hopeless for long"
+    assert priority_for(text, analyze_sentiment(text)) != HIGH
+
+
+def test_negation_does_not_hide_nearby_crisis_text():
+    """Negations in another clause, or before explicit self-harm phrases, do not cancel them."""
+    for text in [
+        "No. I want to die",
+        "I am not okay, suicidal thoughts every night",
+        "I have no reason not to kill myself",
+        "Not sure why. Feeling so alone"
+    ]:
+        assert priority_for(text, analyze_sentiment(text)) == HIGH, text
+
+
+def test_risk_terms_follow_settings(monkeypatch):
+    """Changing RISK_TERMS takes effect without a restart."""
+    text = "I can't go on anymore"
+    assert priority_for(text, analyze_sentiment(text)) != HIGH
+    monkeypatch.setattr(settings, "risk_terms", ["can't go on"])
+    assert priority_for(text, analyze_sentiment(text)) == HIGH
+
+
+def _run_saturated(scheduler, arrivals):
+    """Occupy the only slot, queue `arrivals` in order, and return completion order."""
+    order = []
+
+    async def call(name):
+        order.append(name)
+
+    async def main():
+        release = asyncio.Event()
+        blocker = asyncio.create_task(scheduler.run(LOW, release.wait))
+        await asyncio.sleep(0)
+        tasks = []
+        for name, priority, delay in arrivals:
+            tasks.append(asyncio.create_task(scheduler.run(priority, call, name)))
+            await asyncio.sleep(delay)
+        release.set()
+        await asyncio.gather(blocker, *tasks)
+
+    asyncio.run(main())
+    return order
+
+
+def test_high_priority_jumps_the_queue():
+    """A crisis message queued last is served before earlier casual ones."""
+    scheduler = PriorityScheduler(max_concurrency=1, aging_seconds=60)
+    order = _run_saturated(scheduler, [("low-1", LOW, 0), ("low-2", LOW, 0), ("high", HIGH, 0)])
+    assert order == ["high", "low-1", "low-2"]
+    assert scheduler.stats()["priorities"]["high"]["completed"] == 1
+
+
+def test_aging_prevents_starvation():
+    """A low-priority request that has waited long enough beats a fresh high one."""
+    scheduler = PriorityScheduler(max_concurrency=1, aging_seconds=0.01)
+    order = _run_saturated(scheduler, [("low", LOW, 0.05), ("high", HIGH, 0)])
+    assert order == ["low", "high"]
+
+
+def test_full_queue_rejects():
+    """Requests beyond the queue bound for their level are rejected."""
+    scheduler = PriorityScheduler(max_concurrency=1, queue_size=1)
+
+    async def main():
+        release = asyncio.Event()
+        blocker = asyncio.create_task(scheduler.run(LOW, release.wait))
+        await asyncio.sleep(0)
+        waiting = asyncio.create_task(scheduler.run(LOW, asyncio.sleep, 0))
+        await asyncio.sleep(0)
+        with pytest.raises(SchedulerFull):
+            await scheduler.run(LOW, asyncio.sleep, 0)
+        release.set()
+        await asyncio.gather(blocker, waiting)
+
+    asyncio.run(main())
+    assert scheduler.stats()["priorities"]["low"]["rejected"] == 1
+    assert scheduler.stats()["active"] == 0